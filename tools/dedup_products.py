@@ -0,0 +1,269 @@
+# tools/dedup_products.py
+# ===============================================================
+# Detecta produtos quase duplicados no CSV antes de gastar chamadas à API.
+# Nomes são normalizados (minúsculas, sem acento, sem stopwords) e comparados
+# por MinHash + LSH (NumPy), o que escala para ~100k linhas; URLs de imagem
+# idênticas também marcam duplicata. Cada grupo tem um "canônico" (a menor
+# linha) e os demais apontam para ele.
+#
+# Uso:
+#   python tools/dedup_products.py --csv data/batch_items.csv --threshold 0.7
+#   python tools/dedup_products.py --csv data/batch_items.csv --report-csv outputs/dedup.csv
+#   python -m doctest tools/dedup_products.py      (verifica os casos de banner/URL)
+# ===============================================================
+
+import argparse
+import csv
+import re
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "na", "no",
+    "nas", "nos", "para", "pra", "por", "com", "sem", "um", "uma", "the", "and",
+    "for", "with", "of",
+}
+
+# chamadas evitadas por pack duplicado (ver run_prompt_packs_openai / generate_images_openai)
+TEXT_CALLS_PER_PACK = 3   # cenas, roteiro, descrição (sem contar reparos)
+IMAGES_PER_PACK = 6
+
+_PRIME = np.uint64(4294967311)   # primo > 2^32 (hashes de token têm 32 bits)
+
+
+def normalize_tokens(text: str) -> Set[str]:
+    """'Fone de ouvido Bluetooth TWS Pro' → {'fone', 'ouvido', 'bluetooth', 'tws', 'pro'}."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return {t for t in re.findall(r"\w+", text, flags=re.UNICODE) if t not in STOPWORDS}
+
+def normalize_url(url: str) -> str:
+    return url.strip().split("?")[0].split("#")[0].lower().rstrip("/")
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# ----------------- MinHash / LSH -----------------
+
+def minhash_signatures(token_sets: Sequence[Set[str]], num_perm: int = 64,
+                       seed: int = 1, chunk: int = 20000) -> np.ndarray:
+    """
+    Assinaturas MinHash (n_linhas × num_perm, uint64). Os tokens viram hashes
+    de 32 bits e cada permutação é (a·h + b) mod P; o mínimo por linha sai de
+    um único np.minimum.reduceat por bloco de linhas.
+    Linhas sem tokens recebem a assinatura máxima (nunca colidem com nada).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**31 - 1, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2**31 - 1, size=num_perm, dtype=np.uint64)
+
+    sig = np.full((len(token_sets), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(token_sets), chunk):
+        block = token_sets[start:start + chunk]
+        rows = [i for i, toks in enumerate(block) if toks]
+        if not rows:
+            continue
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) for i in rows for t in block[i]),
+            dtype=np.uint64,
+        )
+        sizes = np.array([len(block[i]) for i in rows], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        perm = (hashes[:, None] * a[None, :] + b[None, :]) % _PRIME
+        sig[start + np.array(rows)] = np.minimum.reduceat(perm, offsets, axis=0)
+    return sig
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Escolhe (bandas, linhas) com limiar LSH (1/b)^(1/r) logo abaixo do threshold."""
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for r in range(1, num_perm + 1):
+        if num_perm % r:
+            continue
+        bands = num_perm // r
+        lsh_t = (1.0 / bands) ** (1.0 / r)
+        # prefere limiar um pouco abaixo (menos falso negativo; a verificação exata filtra)
+        gap = abs(lsh_t - threshold * 0.85)
+        if gap < best_gap:
+            best, best_gap = (bands, r), gap
+    return best
+
+def lsh_candidate_pairs(sig: np.ndarray, bands: int, rows: int,
+                        max_bucket: int = 200) -> Set[Tuple[int, int]]:
+    """Pares (i, j) que caem no mesmo balde em ao menos uma banda."""
+    pairs: Set[Tuple[int, int]] = set()
+    empty = (sig == np.iinfo(np.uint64).max).all(axis=1)
+    valid = np.flatnonzero(~empty)
+    if len(valid) < 2:
+        return pairs
+    for band in range(bands):
+        part = np.ascontiguousarray(sig[valid, band * rows:(band + 1) * rows])
+        keys = part.view(np.dtype((np.void, part.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        ends = np.cumsum(counts)
+        for bucket in np.flatnonzero(counts > 1):
+            members = valid[order[ends[bucket] - counts[bucket]:ends[bucket]]]
+            # baldes enormes (ex.: nomes genéricos) viram estrela a partir do primeiro
+            if len(members) > max_bucket:
+                pairs.update((int(members[0]), int(m)) for m in members[1:])
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((int(members[x]), int(members[y])))
+    return pairs
+
+
+# ----------------- agrupamento -----------------
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def find_duplicates(names: Sequence[str], urls: Optional[Sequence[List[str]]] = None,
+                    threshold: float = 0.7, num_perm: int = 64,
+                    max_url_rows: int = 200) -> Dict[int, Tuple[int, float, str]]:
+    """
+    Retorna {índice_duplicado: (índice_canônico, similaridade, motivo)}, com
+    índices 0-based em `names`. O canônico de cada grupo é o menor índice.
+
+    URL em comum é só candidata: o par ainda precisa do limiar de nome, a não
+    ser que o conjunto inteiro de URLs (2 ou mais) seja igual — fornecedores
+    repetem banners e tabelas de medidas entre produtos diferentes. Cada membro
+    é comparado diretamente com o seu canônico (A≈B≈C não faz C herdar o
+    conteúdo de A).
+
+    >>> banner = "http://c/banner.jpg"
+    >>> find_duplicates(["Mouse Gamer RGB", "Headset Gamer RGB"],
+    ...                 [[banner, "http://c/mouse.jpg"], [banner, "http://c/headset.jpg"]])
+    {}
+    >>> find_duplicates(["Mouse Gamer RGB", "Headset Gamer RGB"], [[banner], [banner]])
+    {}
+    >>> find_duplicates(["Fone Bluetooth TWS Pro", "Fone Bluetooth TWS Pro Max"], [[banner], []])
+    {1: (0, 0.8, 'nome')}
+    >>> find_duplicates(["Kit 3 peças", "Conjunto cozinha"], [["http://a/1.jpg", "http://a/2.jpg"]] * 2)
+    {1: (0, 1.0, 'url')}
+    """
+    n = len(names)
+    token_sets = [normalize_tokens(x) for x in names]
+    url_sets = [frozenset(k for k in (normalize_url(u) for u in lst) if k) for lst in (urls or [[]] * n)]
+    parent = list(range(n))
+
+    def match(i: int, j: int) -> Optional[Tuple[float, str]]:
+        score = jaccard(token_sets[i], token_sets[j])
+        if score >= threshold:
+            return score, "nome"
+        if len(url_sets[i]) > 1 and url_sets[i] == url_sets[j]:
+            return 1.0, "url"
+        return None
+
+    def union(i: int, j: int):
+        ri, rj = _find(parent, i), _find(parent, j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # 1) candidatos: nomes parecidos (MinHash/LSH) e linhas que dividem alguma URL
+    sig = minhash_signatures(token_sets, num_perm=num_perm)
+    bands, rows = choose_bands(num_perm, threshold)
+    candidates = lsh_candidate_pairs(sig, bands, rows)
+    if urls:
+        by_set: Dict[frozenset, List[int]] = {}
+        by_url: Dict[str, List[int]] = {}
+        for i, keys in enumerate(url_sets):
+            if keys:
+                by_set.setdefault(keys, []).append(i)
+            for key in keys:
+                by_url.setdefault(key, []).append(i)
+        for members in by_set.values():          # mesmo conjunto de URLs
+            candidates.update((members[0], m) for m in members[1:])
+        for members in by_url.values():          # URL em comum: candidato (LSH pode ter perdido o par)
+            if 1 < len(members) <= max_url_rows:
+                candidates.update((x, y) for k, x in enumerate(members) for y in members[k + 1:])
+
+    # 2) componentes com os pares que passam na verificação exata
+    for i, j in candidates:
+        if match(i, j):
+            union(i, j)
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(_find(parent, i), []).append(i)
+
+    # 3) dentro de cada componente, cada linha vai para o primeiro canônico com que
+    #    bate diretamente; se não bater com nenhum, vira canônico de um novo grupo
+    out: Dict[int, Tuple[int, float, str]] = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canons: List[int] = []
+        for i in members:   # em ordem crescente: o canônico é sempre a menor linha
+            for c in canons:
+                found = match(c, i)
+                if found:
+                    out[i] = (c, found[0], found[1])
+                    break
+            else:
+                canons.append(i)
+    return out
+
+def print_report(names: Sequence[str], dups: Dict[int, Tuple[int, float, str]],
+                 labels: Optional[Sequence[str]] = None, limit: int = 20):
+    """Resumo do que será economizado (antes de qualquer chamada à API)."""
+    labels = labels or [f"{i + 1:03d}" for i in range(len(names))]
+    groups = {canon for canon, _, _ in dups.values()}
+    print(f"\n🔎 Deduplicação: {len(names)} linha(s), {len(dups)} duplicata(s) em {len(groups)} grupo(s).")
+    for k, (i, (canon, score, why)) in enumerate(sorted(dups.items())):
+        if k >= limit:
+            print(f"   … e mais {len(dups) - limit}")
+            break
+        print(f"   ♻️  {labels[i]} “{names[i]}” ≈ {labels[canon]} “{names[canon]}” ({why}, {score:.2f})")
+    if dups:
+        print(f"💰 Economia estimada: ~{len(dups) * TEXT_CALLS_PER_PACK} chamada(s) de texto "
+              f"e ~{len(dups) * IMAGES_PER_PACK} imagem(ns).")
+
+
+# ----------------- CLI -----------------
+
+def main():
+    from make_prompt_packs import load_rows
+
+    ap = argparse.ArgumentParser(description="Relatório de produtos quase duplicados no CSV (MinHash/LSH).")
+    ap.add_argument("--csv", default="data/batch_items.csv")
+    ap.add_argument("--threshold", type=float, default=0.7, help="Jaccard mínimo entre os tokens dos nomes (0–1)")
+    ap.add_argument("--num-perm", type=int, default=64, help="Permutações MinHash")
+    ap.add_argument("--report-csv", default="", help="Salva o mapeamento duplicado → canônico em CSV")
+    args = ap.parse_args()
+
+    csv_path = Path(args.csv)
+    if not csv_path.exists():
+        raise SystemExit(f"CSV não encontrado: {csv_path.resolve()}")
+    items = [it for it in load_rows(csv_path) if it[1]]
+    names = [prod for _, prod, _ in items]
+    urls = [u for _, _, u in items]
+    width = max(3, len(str(max((i for i, _, _ in items), default=0))))
+    labels = [f"{i:0{width}d}" for i, _, _ in items]
+
+    dups = find_duplicates(names, urls, threshold=args.threshold, num_perm=args.num_perm)
+    print_report(names, dups, labels)
+
+    if args.report_csv:
+        out = Path(args.report_csv)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with out.open("w", encoding="utf-8", newline="") as f:
+            wr = csv.writer(f)
+            wr.writerow(["linha", "produto", "canonico_linha", "canonico_produto", "similaridade", "motivo"])
+            for i, (canon, score, why) in sorted(dups.items()):
+                wr.writerow([labels[i], names[i], labels[canon], names[canon], f"{score:.3f}", why])
+        print(f"🗂  relatório: {out.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
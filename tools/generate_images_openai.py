@@ -8,12 +8,23 @@
 import os
 import re
 import base64
+import shutil
 import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 from typing import List, Optional
 from PIL import Image
 
+from hedging import HedgedCaller
+from pack_store import open_store
+
+# Prazo/hedge das chamadas de imagem (configurado no main; None = chamada direta)
+CALLER: Optional[HedgedCaller] = None
+
+def call_api(fn):
+    """Passa fn(timeout) pelo CALLER (prazo + hedge) quando configurado."""
+    return CALLER.call("imagem", fn) if CALLER else fn(None)
+
 
 # ----------------- util -----------------
 
@@ -94,24 +105,30 @@ def find_source_image(pack_dir: Path, source_root: Optional[Path]) -> Optional[P
 # ----------------- openai helpers -----------------
 
 def generate_image_bytes_from_text(client, model: str, prompt: str, size: str) -> bytes:
-    resp = client.images.generate(model=model, prompt=prompt, size=size)
+    resp = call_api(lambda timeout: client.images.generate(
+        model=model, prompt=prompt, size=size, **({"timeout": timeout} if timeout else {})))
     b64 = resp.data[0].b64_json
     return base64.b64decode(b64)
 
 def generate_image_bytes_from_edit_with_fallback(client, model: str, source_png: Path, prompt: str, size: str) -> bytes:
     """
-    Tenta image-to-image; se o SDK não tiver .edits/.edit, cai para generate().
+    Tenta image-to-image; se o SDK não tiver .edits/.edit (ou o modelo não aceitar
+    edição), cai para generate(). Prazo estourado e erros de rede/limite sobem:
+    refazer com generate() pagaria a imagem duas vezes.
     """
+    from openai import BadRequestError, NotFoundError
     try:
         # SDKs mais antigos:
         fn = getattr(client.images, "edits", None) or getattr(client.images, "edit", None)
         if fn is None:
             raise AttributeError("images.edits/edit não disponível; usando generate()")
-        with open(source_png, "rb") as f:
-            resp = fn(model=model, image=f, prompt=prompt, size=size)
+        image_bytes = source_png.read_bytes()  # cada tentativa (hedge) precisa do próprio arquivo
+        resp = call_api(lambda timeout: fn(
+            model=model, image=(source_png.name, image_bytes, "image/png"), prompt=prompt, size=size,
+            **({"timeout": timeout} if timeout else {})))
         b64 = resp.data[0].b64_json
         return base64.b64decode(b64)
-    except Exception as e:
+    except (AttributeError, TypeError, BadRequestError, NotFoundError) as e:
         print(f"ℹ️  image-to-image indisponível ({e}); usando generate().")
         return generate_image_bytes_from_text(client, model, prompt, size)
 
@@ -121,87 +138,114 @@ def generate_image_bytes_from_edit_with_fallback(client, model: str, source_png:
 def main():
     load_dotenv()
     from openai import OpenAI
-    client = OpenAI()
 
     ap = argparse.ArgumentParser(description="Gera imagens IA a partir dos prompts de '## IMAGENS (ChatGPT)'.")
     ap.add_argument("--packs-root", default="outputs/prompt_packs")
+    ap.add_argument("--store", default="", help="Arquivo SQLite de packs (ex.: outputs/packs.sqlite)")
     ap.add_argument("--model", default="gpt-image-1")
     ap.add_argument("--size", default="1024x1536")
     ap.add_argument("--overwrite", action="store_true")
     ap.add_argument("--source-root", default="", help="Pasta externa com a imagem baixada (ex.: --final-root da pipeline)")
     ap.add_argument("--final-root",  default="", help="Pasta externa onde salvar as PNGs (subpasta por produto)")
+    ap.add_argument("--deadline", type=float, default=300, help="Prazo por imagem, em segundos")
+    ap.add_argument("--hedge", action="store_true", help="Dispara uma cópia da chamada que passar do p95 e usa a primeira resposta")
+    ap.add_argument("--hedge-budget", type=float, default=0.05, help="Máximo de chamadas extras por hedge (fração do total)")
     args = ap.parse_args()
 
+    global CALLER
+    CALLER = HedgedCaller(default_deadline=args.deadline, hedge=args.hedge, budget=args.hedge_budget)
+    # com hedge, a cópia faz o papel do retry: sem retries do SDK, a tentativa
+    # que perdeu para no próprio timeout; sem hedge, os retries do SDK continuam
+    client = OpenAI(max_retries=0) if args.hedge else OpenAI()
+
     packs_root = Path(args.packs_root)
     source_root = Path(args.source_root) if args.source_root else None
     final_root  = Path(args.final_root)  if args.final_root  else None
 
-    if not packs_root.exists():
+    if args.store and not Path(args.store).exists():
+        raise SystemExit(f"Store não encontrado: {args.store}")
+    if not args.store and not packs_root.exists():
         raise SystemExit(f"Pasta de packs não encontrada: {packs_root}")
 
-    packs = [p for p in packs_root.iterdir() if p.is_dir()]
     total = 0
-
-    for pack in sorted(packs):
-        # 1) pega o texto de cenas
-        respostas = pack / "RESPOSTA_prompt_01_cenas.txt"
-        original  = pack / "prompt_01_cenas.txt"
-        full_text = read(respostas) or read(original)
-        if not full_text:
-            print(f"⚠️  {pack.name}: sem texto de cenas — pulando.")
-            continue
-
-        only_images = extract_images_section(full_text)
-        blocks = split_prompts(only_images)
-        print(f"\n▶️  {pack.name}: gerando imagens ({len(blocks)} prompts detectados).")
-        if not blocks:
-            print("⚠️  Nenhum prompt de imagem detectado nesta seção — pulando.")
-            continue
-
-        # 2) pasta de saída
-        out_dir = (final_root / pack.name) if final_root else pack
-        out_dir.mkdir(parents=True, exist_ok=True)
-        captions_path = out_dir / "_captions.txt"
-        captions_lines = []
-
-        # 3) imagem base
-        source = find_source_image(pack, source_root)
-        source_png = to_png(source) if source else None
-        if source_png:
-            print(f"🧷 usando imagem-base: {source_png}")
-        else:
-            print("ℹ️  sem imagem-base; gerando a partir de texto puro")
-
-        # 4) gera cada prompt
-        for idx, block in enumerate(blocks, start=1):
-            prompt = build_image_prompt(block)
-            png_path = out_dir / f"{idx:03d}.png"
-
-            if png_path.exists() and not args.overwrite:
-                print(f"⏭  {png_path.name} já existe (use --overwrite para refazer).")
-                captions_lines.append(f"{png_path.name} | {prompt}")
+    with open_store(packs_root, args.store) as store:
+        for pack_id in store.ids():
+            pack = packs_root / pack_id
+            # 1) pega o texto de cenas
+            full_text = (store.read(pack_id, "RESPOSTA_prompt_01_cenas.txt")
+                         or store.read(pack_id, "prompt_01_cenas.txt"))
+            if not full_text:
+                print(f"⚠️  {pack.name}: sem texto de cenas — pulando.")
                 continue
 
-            print(f"🎯 Gerando imagem {idx} ({png_path.name})...")
-
-            try:
-                if source_png:
-                    img_bytes = generate_image_bytes_from_edit_with_fallback(client, args.model, source_png, prompt, args.size)
-                else:
-                    img_bytes = generate_image_bytes_from_text(client, args.model, prompt, args.size)
-
-                png_path.write_bytes(img_bytes)
-                captions_lines.append(f"{png_path.name} | {prompt}")
-                total += 1
-                print(f"✅  salvo: {png_path}")
-            except Exception as e:
-                err = out_dir / f"{idx:03d}_ERROR.txt"
-                write(err, f"Prompt:\n{prompt}\n\nErro:\n{e}")
-                print(f"❌  erro na cena {idx}: {e}")
-
-        write(captions_path, "\n".join(captions_lines))
-        print(f"🗂  legendas: {captions_path}")
+            only_images = extract_images_section(full_text)
+            blocks = split_prompts(only_images)
+            print(f"\n▶️  {pack.name}: gerando imagens ({len(blocks)} prompts detectados).")
+            CALLER.next_pack()
+            if not blocks:
+                print("⚠️  Nenhum prompt de imagem detectado nesta seção — pulando.")
+                continue
 
+            # 2) pasta de saída
+            out_dir = (final_root / pack.name) if final_root else pack
+            out_dir.mkdir(parents=True, exist_ok=True)
+            captions_path = out_dir / "_captions.txt"
+            captions_lines = []
+
+            # duplicado (make_prompt_packs --dedup flag): copia as PNGs do canônico em vez de gerar
+            dup_of = store.meta(pack_id).get("duplicate_of")
+            if dup_of:
+                canon_dir = (final_root / dup_of) if final_root else (packs_root / dup_of)
+                canon_pngs = sorted(canon_dir.glob("[0-9][0-9][0-9].png"))
+                if canon_pngs:
+                    for src in canon_pngs:
+                        shutil.copy2(src, out_dir / src.name)
+                    if (canon_dir / "_captions.txt").exists():
+                        shutil.copy2(canon_dir / "_captions.txt", captions_path)
+                    print(f"♻️  duplicado de {dup_of} — {len(canon_pngs)} imagem(ns) copiada(s), sem chamadas à API.")
+                    continue
+                print(f"⚠️  duplicado de {dup_of}, mas o canônico ainda não tem PNGs — gerando normalmente.")
+
+            # 3) imagem base
+            source = find_source_image(pack, source_root)
+            source_png = to_png(source) if source else None
+            if source_png:
+                print(f"🧷 usando imagem-base: {source_png}")
+            else:
+                print("ℹ️  sem imagem-base; gerando a partir de texto puro")
+
+            # 4) gera cada prompt
+            for idx, block in enumerate(blocks, start=1):
+                prompt = build_image_prompt(block)
+                png_path = out_dir / f"{idx:03d}.png"
+
+                if png_path.exists() and not args.overwrite:
+                    print(f"⏭  {png_path.name} já existe (use --overwrite para refazer).")
+                    captions_lines.append(f"{png_path.name} | {prompt}")
+                    continue
+
+                print(f"🎯 Gerando imagem {idx} ({png_path.name})...")
+
+                try:
+                    if source_png:
+                        img_bytes = generate_image_bytes_from_edit_with_fallback(client, args.model, source_png, prompt, args.size)
+                    else:
+                        img_bytes = generate_image_bytes_from_text(client, args.model, prompt, args.size)
+
+                    png_path.write_bytes(img_bytes)
+                    captions_lines.append(f"{png_path.name} | {prompt}")
+                    total += 1
+                    print(f"✅  salvo: {png_path}")
+                except Exception as e:
+                    err = out_dir / f"{idx:03d}_ERROR.txt"
+                    write(err, f"Prompt:\n{prompt}\n\nErro:\n{e}")
+                    print(f"❌  erro na cena {idx}: {e}")
+
+            write(captions_path, "\n".join(captions_lines))
+            print(f"🗂  legendas: {captions_path}")
+
+    CALLER.report()
+    CALLER.close()
     print(f"\n🎉 Concluído. Imagens geradas: {total}")
 
 
@@ -0,0 +1,222 @@
+# tools/hedging.py
+# ===============================================================
+# Prazos por chamada e "hedged requests" para cortar a cauda de latência.
+# Cada chamada à API roda numa thread com prazo (timeout repassado ao SDK).
+# Se ela passar do p95 observado para aquele tipo de tarefa, dispara uma
+# cópia e fica com a que responder primeiro; a outra é cancelada (ou, se já
+# estiver em voo, é abandonada e morre no próprio timeout). Cópias só são
+# disparadas enquanto couberem no orçamento (fração de chamadas extras).
+#
+# Uso (nos scripts):
+#   caller = HedgedCaller(deadlines={"roteiro": 60}, default_deadline=120, hedge=True, budget=0.05)
+#   resp = caller.call("roteiro", lambda timeout: client.chat.completions.create(..., timeout=timeout))
+#   caller.report()
+# ===============================================================
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional
+
+
+def parse_deadlines(spec: str) -> Dict[str, float]:
+    """'cenas=90,roteiro=60' → {'cenas': 90.0, 'roteiro': 60.0}."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        task, secs = part.split("=", 1)
+        try:
+            out[task.strip()] = float(secs)
+        except ValueError:
+            raise SystemExit(f"Prazo inválido em --deadlines: {part!r}")
+    return out
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    vals = sorted(values)
+    k = min(len(vals) - 1, max(0, int(round(q * (len(vals) - 1)))))
+    return vals[k]
+
+
+class _CallRecord:
+    """Uma chamada lógica: latência efetiva e a que teria sem a cópia."""
+    __slots__ = ("task", "latency", "primary_latency", "primary_finished", "hedged", "hedge_won", "deadline")
+
+    def __init__(self, task: str, deadline: float):
+        self.task = task
+        self.deadline = deadline
+        self.latency: Optional[float] = None
+        self.primary_latency: Optional[float] = None
+        self.primary_finished = False
+        self.hedged = False
+        self.hedge_won = False
+
+    @property
+    def counterfactual(self) -> Optional[float]:
+        """
+        Latência sem hedge: a da original, o prazo se ela falhou/estourou, ou
+        None se ela ainda está em voo (não dá para saber).
+        """
+        if self.primary_latency is not None:
+            return self.primary_latency
+        if self.hedged:
+            return self.deadline if self.primary_finished else None
+        return self.latency or 0.0
+
+
+class HedgedCaller:
+    def __init__(self, deadlines: Optional[Dict[str, float]] = None, default_deadline: float = 120.0,
+                 hedge: bool = False, budget: float = 0.05, quantile: float = 0.95,
+                 min_samples: int = 10, window: int = 200, max_workers: int = 8):
+        self.deadlines = dict(deadlines or {})
+        self.default_deadline = default_deadline
+        self.hedge = hedge
+        self.budget = budget
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._lat: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._records: List[_CallRecord] = []
+        self._packs: List[List[_CallRecord]] = []
+        self._current: Optional[List[_CallRecord]] = None
+        self._stragglers: List = []   # originais que perderam para a cópia e seguem em voo
+        self.calls = 0
+        self.hedges = 0
+        self.timeouts = 0
+
+    # ---- configuração por tarefa ----
+
+    def deadline_for(self, task: str) -> float:
+        return self.deadlines.get(task, self.default_deadline)
+
+    def hedge_delay(self, task: str) -> float:
+        """p95 observado da tarefa; sem amostras suficientes, 1/3 do prazo."""
+        with self._lock:
+            samples = list(self._lat[task])
+        if len(samples) < self.min_samples:
+            return self.deadline_for(task) / 3
+        return percentile(samples, self.quantile)
+
+    def _budget_ok(self) -> bool:
+        with self._lock:
+            return self.hedges + 1 <= self.budget * max(1, self.calls)
+
+    # ---- agrupamento por pack (para medir a latência por pack) ----
+
+    def next_pack(self):
+        """Fecha o pack anterior e começa a contar as chamadas de um novo."""
+        with self._lock:
+            self._current = []
+            self._packs.append(self._current)
+
+    # ---- chamada ----
+
+    def call(self, task: str, fn: Callable[[Optional[float]], object]):
+        """
+        Executa fn(timeout) com prazo e, se habilitado, hedge. Levanta
+        TimeoutError se nenhuma tentativa responder dentro do prazo.
+        """
+        deadline = self.deadline_for(task)
+        rec = _CallRecord(task, deadline)
+        with self._lock:
+            self.calls += 1
+            self._records.append(rec)
+            if self._current is not None:
+                self._current.append(rec)
+
+        t0 = time.perf_counter()
+        primary = self.pool.submit(fn, deadline)
+
+        def on_primary_done(fut, t0=t0):
+            if not fut.cancelled() and fut.exception() is None:
+                rec.primary_latency = time.perf_counter() - t0
+            rec.primary_finished = True
+        primary.add_done_callback(on_primary_done)
+
+        pending = {primary}
+        if self.hedge:
+            done, _ = wait(pending, timeout=min(self.hedge_delay(task), deadline))
+            if not done and self._budget_ok():
+                remaining = deadline - (time.perf_counter() - t0)
+                if remaining > 0:
+                    with self._lock:
+                        self.hedges += 1
+                    rec.hedged = True
+                    pending.add(self.pool.submit(fn, remaining))
+
+        error: Optional[BaseException] = None
+        while pending:
+            remaining = deadline - (time.perf_counter() - t0)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    latency = time.perf_counter() - t0
+                    rec.latency = latency
+                    rec.hedge_won = fut is not primary
+                    for other in pending:
+                        other.cancel()
+                    with self._lock:
+                        self._lat[task].append(latency)
+                        if rec.hedge_won and not primary.done():
+                            self._stragglers.append(primary)
+                    return fut.result()
+                error = fut.exception()
+
+        rec.latency = time.perf_counter() - t0
+        for other in pending:
+            other.cancel()
+        if error is not None and not pending:
+            raise error
+        with self._lock:
+            self.timeouts += 1
+        raise TimeoutError(f"{task}: sem resposta em {deadline:g}s")
+
+    # ---- relatório ----
+
+    def report(self, grace: float = 10.0):
+        """
+        Imprime o resumo. Espera até `grace` segundos pelas originais que
+        perderam para a cópia: sem a latência delas, a economia do hedge
+        seria superestimada (packs com original ainda em voo ficam de fora).
+        """
+        with self._lock:
+            stragglers = [f for f in self._stragglers if not f.done()]
+        if stragglers:
+            wait(stragglers, timeout=grace)
+        with self._lock:
+            records = [r for r in self._records if r.latency is not None]
+            packs = [p for p in self._packs if p]
+        if not records:
+            return
+        print("\n⏱️  Latência por tarefa (s):")
+        by_task: Dict[str, List[_CallRecord]] = defaultdict(list)
+        for r in records:
+            by_task[r.task].append(r)
+        for task, recs in sorted(by_task.items()):
+            lat = [r.latency for r in recs]
+            fired = sum(r.hedged for r in recs)
+            won = sum(r.hedge_won for r in recs)
+            print(f"   {task:<10} n={len(recs):<5} p50={percentile(lat, .5):6.1f} "
+                  f"p95={percentile(lat, .95):6.1f} p99={percentile(lat, .99):6.1f} "
+                  f"| prazo={self.deadline_for(task):g} hedges={fired} ({100 * fired / len(recs):.1f}%) venceram={won}")
+        print(f"   chamadas extras (hedge): {self.hedges}/{self.calls} "
+              f"({100 * self.hedges / max(1, self.calls):.1f}%, orçamento {100 * self.budget:.0f}%) | estouros de prazo: {self.timeouts}")
+        if packs and self.hedges:
+            known = [p for p in packs if all(r.counterfactual is not None for r in p)]
+            if not known:
+                return
+            actual = [sum(r.latency or 0.0 for r in p) for p in known]
+            without = [sum(r.counterfactual for r in p) for p in known]
+            a99, w99 = percentile(actual, .99), percentile(without, .99)
+            left_out = f" ({len(packs) - len(known)} pack(s) com original em voo fora da conta)" if len(known) < len(packs) else ""
+            print(f"   p99 por pack: {a99:.1f}s com hedge vs ~{w99:.1f}s sem hedge (economia ~{w99 - a99:.1f}s){left_out}")
+
+    def close(self):
+        # cópias perdedoras ainda em voo terminam sozinhas no próprio timeout
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,313 @@
+# tools/local_descriptions.py
+# ===============================================================
+# Gera descrição + hashtags para TikTok offline, a partir das saídas antigas.
+# Cada final (<pack>.txt) com a seção "### DESCRIÇÃO (TIKTOK)" vira um
+# documento num índice TF-IDF (nome do produto + descrição). Para um lote de
+# produtos, tudo é calculado em NumPy numa passada:
+#   - similaridade de cosseno contra o índice (índice invertido esparso);
+#   - descrição = a do vizinho mais próximo, trocando o nome do produto;
+#   - hashtags = votos dos vizinhos ponderados pela similaridade, que equivalem
+#     às estatísticas de coocorrência termo → hashtag, + hashtags que batem
+#     com termos do próprio nome.
+# Quando a confiança é baixa, quem chama deve recorrer ao LLM.
+#
+# Uso:
+#   python tools/local_descriptions.py --corpus outputs/prompt_packs "D:/Conteudos/Resultados" \
+#       --products "Fone Bluetooth TWS" "Mouse Gamer RGB"
+#   python tools/local_descriptions.py --store outputs/packs.sqlite --csv data/batch_items.csv
+# ===============================================================
+
+import argparse
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dedup_products import STOPWORDS, jaccard
+
+DESC_SECTION = re.compile(r"^\s*###\s*DESCRI[CÇ][AÃ]O\s*\(TIKTOK\)\s*$", re.IGNORECASE)
+NEXT_HEADING = re.compile(r"^\s*#{1,3}\s+\S")
+HASHTAG = re.compile(r"#\w+", re.UNICODE)
+GENERIC_MARKER = "#Achadinhos #Promo #LojaOnline"   # fallback fixo do run_prompt_packs_openai
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return [t for t in re.findall(r"\w+", text, flags=re.UNICODE)
+            if t not in STOPWORDS and len(t) > 1 and not t.isdigit()]
+
+def product_from_pack(pack_name: str) -> str:
+    """'001-fone-bluetooth-tws' → 'Fone Bluetooth Tws' (mesma regra do passo 4 do runner)."""
+    return re.sub(r"^\d{3,}-", "", pack_name).replace("-", " ").strip().title()
+
+
+# ----------------- corpus -----------------
+
+def parse_description(final_text: str) -> Optional[Tuple[str, List[str]]]:
+    """Extrai (descrição sem hashtags, [hashtags]) da seção DESCRIÇÃO de um final."""
+    lines = final_text.splitlines()
+    buf, in_sec = [], False
+    for ln in lines:
+        if not in_sec and DESC_SECTION.match(ln):
+            in_sec = True
+            continue
+        if in_sec and NEXT_HEADING.match(ln):
+            break
+        if in_sec:
+            buf.append(ln)
+    body = "\n".join(buf).strip()
+    if not body or GENERIC_MARKER in body or body.startswith("[ERRO"):
+        return None
+    tags, seen = [], set()
+    for t in HASHTAG.findall(body):
+        if t.lower() not in seen:
+            tags.append(t)
+            seen.add(t.lower())
+    desc = HASHTAG.sub("", body)
+    desc = re.sub(r"[ \t]+", " ", desc)
+    desc = re.sub(r"\n{3,}", "\n\n", desc).strip()
+    if not desc:
+        return None
+    return desc, tags
+
+def iter_finals(roots: Iterable[Path], store=None) -> Iterable[Tuple[str, str]]:
+    """(nome_do_pack, texto_final) dos finais em pastas (<pack>/<pack>.txt) e/ou no store."""
+    seen = set()
+    if store is not None:
+        for pack_id in store.ids():
+            text = store.read(pack_id, f"{pack_id}.txt")
+            if text:
+                seen.add(pack_id)
+                yield pack_id, text
+    for root in roots:
+        root = Path(root)
+        if not root.exists():
+            continue
+        for f in root.rglob("*.txt"):
+            if f.stem == f.parent.name and f.stem not in seen:
+                seen.add(f.stem)
+                try:
+                    yield f.stem, f.read_text(encoding="utf-8")
+                except UnicodeDecodeError:
+                    yield f.stem, f.read_text(encoding="utf-8-sig")
+
+
+# ----------------- índice -----------------
+
+def _gather(indptr: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Para linhas de uma matriz CSR, devolve (dono, posição): `dono` é o índice
+    em `rows` e `posição` aponta para indices/data. Evita laço em Python.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(starts, counts) + offsets
+
+
+class LocalDescriber:
+    """Índice TF-IDF léxico sobre descrições/hashtags antigas."""
+
+    def __init__(self, docs: Sequence[Tuple[str, str, List[str]]]):
+        """docs: [(produto, descrição, [hashtags]), ...]"""
+        self.products = [d[0] for d in docs]
+        self.descs = [d[1] for d in docs]
+        self.name_tokens = [set(tokenize(p)) for p in self.products]
+
+        # vocabulário de termos e de hashtags
+        self.vocab: Dict[str, int] = {}
+        self.tag_vocab: Dict[str, int] = {}
+        self.tag_names: List[str] = []
+        doc_terms, doc_tags = [], []
+        for prod, desc, tags in docs:
+            # o nome pesa em dobro: a consulta é basicamente o nome do produto
+            terms = tokenize(prod) * 2 + tokenize(desc)
+            ids = np.array([self.vocab.setdefault(t, len(self.vocab)) for t in terms], dtype=np.int64)
+            doc_terms.append(np.unique(ids, return_counts=True))
+            tids = []
+            for t in tags:
+                key = t.lower()
+                if key not in self.tag_vocab:
+                    self.tag_vocab[key] = len(self.tag_names)
+                    self.tag_names.append(t)
+                tids.append(self.tag_vocab[key])
+            doc_tags.append(np.array(sorted(set(tids)), dtype=np.int64))
+
+        n_docs, n_terms = len(docs), max(1, len(self.vocab))
+        df = np.zeros(n_terms, dtype=np.float64)
+        for ids, _ in doc_terms:
+            df[ids] += 1
+        self.idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+
+        # matriz termo × documento em CSC (índice invertido): postings por termo
+        rows, cols, vals = [], [], []
+        for d, (ids, counts) in enumerate(doc_terms):
+            if not len(ids):
+                continue
+            w = (1 + np.log(counts)) * self.idf[ids]
+            w /= np.linalg.norm(w) or 1.0
+            rows.append(ids); cols.append(np.full(len(ids), d)); vals.append(w)
+        term = np.concatenate(rows).astype(np.int64) if rows else np.array([], np.int64)
+        doc = np.concatenate(cols).astype(np.int64) if cols else np.array([], np.int64)
+        val = np.concatenate(vals) if vals else np.array([], np.float64)
+        order = np.argsort(term, kind="stable")
+        self.post_doc = doc[order]
+        self.post_w = val[order].astype(np.float32)
+        self.post_ptr = np.concatenate(([0], np.cumsum(np.bincount(term, minlength=n_terms))))
+
+        # hashtags por documento em CSR
+        self.tag_ptr = np.concatenate(([0], np.cumsum([len(t) for t in doc_tags])))
+        self.tag_idx = np.concatenate(doc_tags) if doc_tags else np.array([], np.int64)
+
+    def __len__(self):
+        return len(self.products)
+
+    @classmethod
+    def from_finals(cls, roots: Iterable[Path], store=None,
+                    exclude: Iterable[str] = ()) -> "LocalDescriber":
+        """
+        Índice dos finais encontrados. `exclude`: packs que serão descritos agora —
+        o final antigo do próprio pack seria sempre o vizinho mais próximo.
+        """
+        skip = set(exclude)
+        docs = []
+        for pack_name, text in iter_finals(roots, store):
+            if pack_name in skip:
+                continue
+            parsed = parse_description(text)
+            if parsed:
+                docs.append((product_from_pack(pack_name), parsed[0], parsed[1]))
+        return cls(docs)
+
+    # ---- consulta em lote ----
+
+    def similarities(self, queries: Sequence[str]) -> np.ndarray:
+        """Cosseno (n_consultas × n_docs) entre os nomes consultados e o índice."""
+        sims = np.zeros((len(queries), len(self)), dtype=np.float32)
+        q_rows, q_terms, q_vals = [], [], []
+        for qi, q in enumerate(queries):
+            ids = [self.vocab[t] for t in tokenize(q) if t in self.vocab]
+            if not ids:
+                continue
+            ids, counts = np.unique(ids, return_counts=True)
+            w = (1 + np.log(counts)) * self.idf[ids]
+            w /= np.linalg.norm(w)
+            q_rows.append(np.full(len(ids), qi)); q_terms.append(ids); q_vals.append(w)
+        if not q_rows or not len(self):
+            return sims
+        q_rows, q_terms, q_vals = map(np.concatenate, (q_rows, q_terms, q_vals))
+        owner, pos = _gather(self.post_ptr, q_terms)
+        np.add.at(sims, (q_rows[owner], self.post_doc[pos]), (q_vals[owner] * self.post_w[pos]).astype(np.float32))
+        return sims
+
+    def generate(self, products: Sequence[str], top_k: int = 15, n_tags: int = 10,
+                 min_tags: int = 8, min_name_overlap: float = 0.6,
+                 chunk: int = 512) -> List[Tuple[str, float, bool]]:
+        """
+        Para cada produto devolve (texto "descrição + hashtags", confiança, tem_hashtags_suficientes).
+        Só contam vizinhos cujo nome divide termos suficientes com o produto
+        (Jaccard ≥ min_name_overlap — "Headset Gamer" não herda a descrição nem
+        as hashtags do "Mouse Gamer"). A confiança é o cosseno do melhor deles,
+        e cai para 0 se não houver nenhum ou se o nome não pôde ser trocado no texto.
+        """
+        out: List[Tuple[str, float, bool]] = []
+        if not len(self):
+            return [("", 0.0, False) for _ in products]
+        k = min(top_k, len(self))
+        for start in range(0, len(products), chunk):
+            batch = list(products[start:start + chunk])
+            sims = self.similarities(batch)
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_w = np.take_along_axis(sims, top, axis=1)
+            n_q = len(batch)
+            q_tokens = [set(tokenize(p)) for p in batch]
+            near = np.array([[jaccard(q_tokens[qi], self.name_tokens[d]) >= min_name_overlap for d in row]
+                             for qi, row in enumerate(top)], dtype=bool).reshape(n_q, k)
+            top_w = np.where(near, top_w, 0.0).astype(np.float32)
+
+            # votos de hashtags: Σ sim(vizinho) · [hashtag ∈ vizinho], só vizinhos próximos
+            flat_doc = top.ravel()
+            flat_q = np.repeat(np.arange(n_q), k)
+            flat_w = top_w.ravel()
+            owner, pos = _gather(self.tag_ptr, flat_doc)
+            scores = np.zeros((n_q, max(1, len(self.tag_names))), dtype=np.float32)
+            np.add.at(scores, (flat_q[owner], self.tag_idx[pos]), flat_w[owner])
+
+            best = top[np.arange(n_q), np.argmax(top_w, axis=1)]
+            best_sim = top_w.max(axis=1)
+            for qi, prod in enumerate(batch):
+                # hashtags que coincidem com termos do próprio nome (#webcam, #fone…)
+                for t in q_tokens[qi]:
+                    ti = self.tag_vocab.get(f"#{t}")
+                    if ti is not None:
+                        scores[qi, ti] += float(best_sim[qi]) + 1.0
+                order = np.argsort(-scores[qi])[:n_tags]
+                tags = [self.tag_names[t] for t in order if scores[qi, t] > 0]
+
+                desc, swapped = swap_product_name(self.descs[best[qi]], self.products[best[qi]], prod)
+                conf = float(best_sim[qi]) if swapped else 0.0
+                text = desc + ("\n\n" + " ".join(tags) if tags else "")
+                out.append((text, conf, len(tags) >= min_tags))
+        return out
+
+def swap_product_name(desc: str, old: str, new: str) -> Tuple[str, bool]:
+    """Troca o nome do produto vizinho pelo novo (sem diferenciar maiúsculas)."""
+    if not old or not new:
+        return desc, False
+    pattern = re.compile(re.escape(old).replace(r"\ ", r"[\s-]+"), re.IGNORECASE)
+    if pattern.search(desc):
+        return pattern.sub(new, desc), True
+    return desc, old.lower() == new.lower()
+
+
+# ----------------- CLI -----------------
+
+def main():
+    import time
+    from pack_store import PackStore
+
+    ap = argparse.ArgumentParser(description="Descrição + hashtags offline a partir dos finais antigos.")
+    ap.add_argument("--corpus", nargs="*", default=["outputs/prompt_packs"],
+                    help="Pastas com finais antigos (<pack>/<pack>.txt)")
+    ap.add_argument("--store", default="", help="Store SQLite com finais antigos")
+    ap.add_argument("--products", nargs="*", default=[], help="Nomes de produtos para gerar")
+    ap.add_argument("--csv", default="", help="Ou: gera para todos os produtos do CSV")
+    ap.add_argument("--min-score", type=float, default=0.5, help="Confiança mínima para dispensar o LLM")
+    args = ap.parse_args()
+
+    store = PackStore(Path(args.store)) if args.store else None
+    t0 = time.perf_counter()
+    describer = LocalDescriber.from_finals([Path(p) for p in args.corpus], store)
+    t_index = time.perf_counter() - t0
+    print(f"📚 índice: {len(describer)} descrição(ões), {len(describer.vocab)} termos, "
+          f"{len(describer.tag_names)} hashtags ({t_index:.2f}s)")
+    if not len(describer):
+        raise SystemExit("Nenhuma descrição encontrada no corpus.")
+
+    products = list(args.products)
+    if args.csv:
+        from make_prompt_packs import load_rows
+        products += [p for _, p, _ in load_rows(Path(args.csv)) if p]
+    if not products:
+        raise SystemExit("Informe --products ou --csv.")
+
+    t0 = time.perf_counter()
+    results = describer.generate(products)
+    elapsed = time.perf_counter() - t0
+    ok = 0
+    for prod, (text, conf, enough) in zip(products, results):
+        good = conf >= args.min_score and enough
+        ok += good
+        print(f"\n{'✅' if good else '🤖'} {prod}  (confiança {conf:.2f}{'' if good else ' → LLM'})\n{text}")
+    per_pack = 1000 * elapsed / max(1, len(products))
+    print(f"\n🎉 {ok}/{len(products)} resolvidos localmente — {per_pack:.2f} ms/pack")
+    if store:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
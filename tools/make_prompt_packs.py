@@ -3,12 +3,16 @@
 # Uso:
 #   python tools/make_prompt_packs.py --guide "guides/Guia criação dos vídeos.txt" \
 #       --csv "data/batch_items.csv" --packs-root "outputs/prompt_packs"
+#   python tools/make_prompt_packs.py --csv "data/batch_items.csv" --store "outputs/packs.sqlite"
 
 import argparse
 import csv
 import os
 import re
 from pathlib import Path
+from typing import List, Tuple
+
+from pack_store import open_store
 
 def slugify(text: str) -> str:
     text = text.lower().strip()
@@ -25,32 +29,11 @@ def read_text(path: Path) -> str:
     except UnicodeDecodeError:
         return path.read_text(encoding="utf-8-sig")
 
-def main():
-    ap = argparse.ArgumentParser(description="Gera prompt packs a partir de CSV.")
-    ap.add_argument("--guide", default="guides/Guia criação dos vídeos.txt",
-                    help="Guia base (opcional). Default: guides/Guia criação dos vídeos.txt")
-    ap.add_argument("--csv", default="data/batch_items.csv",
-                    help="CSV com colunas: produto, shopee_image_urls")
-    ap.add_argument("--packs-root", default="outputs/prompt_packs",
-                    help="Diretório de saída dos packs")
-    args = ap.parse_args()
-
-    guide_path = Path(args.guide)
-    # se vier só o nome, tenta em guides/
-    if not guide_path.exists():
-        alt = Path("guides") / guide_path.name
-        guide_path = alt if alt.exists() else guide_path
-
-    csv_path = Path(args.csv)
-    out_root = Path(args.packs_root)
-    out_root.mkdir(parents=True, exist_ok=True)
-
-    if not csv_path.exists():
-        raise SystemExit(f"CSV não encontrado: {csv_path.resolve()}")
-
-    guide_text = read_text(guide_path)  # opcional
-
-    # lê CSV e valida cabeçalhos
+def load_rows(csv_path: Path) -> List[Tuple[int, str, List[str]]]:
+    """
+    Lê o CSV e devolve [(linha_1based, produto, [urls...]), ...].
+    Aceita nomes de colunas alternativos (product/title/nome, image_urls/urls/links).
+    """
     with csv_path.open("r", encoding="utf-8") as f:
         try:
             rd = csv.DictReader(f)
@@ -78,39 +61,35 @@ def main():
     if not col_prod:
         raise SystemExit(f"CSV sem coluna 'produto'. Cabeçalhos encontrados: {headers}")
 
-    created = 0
+    out = []
     for i, row in enumerate(rows, 1):
         produto = (row.get(col_prod) or "").strip()
-        if not produto:
-            print(f"[{i:03d}] pulado: sem '{col_prod}'")
-            continue
         urls_raw = (row.get(col_urls) or "").strip() if col_urls else ""
         urls = [u.strip() for u in urls_raw.split(";") if u.strip()] if urls_raw else []
-
-        slug = slugify(produto)
-        pack_dir = out_root / f"{i:03d}-{slug}"
-        pack_dir.mkdir(parents=True, exist_ok=True)
-
-        # --------- Templates ---------
-        p01 = []
-        if guide_text:
-            p01.append("# Contexto (guia)\n" + guide_text.strip() + "\n")
-        p01.append(f"Você vai propor 6 ideias visuais para o produto: **{produto}**.")
-        p01.append(
-            "- Regras obrigatórias para TODAS as ideias: proporção **9:16 (vertical)** e **sem textos/legendas/overlays** na imagem.\n"
-            "- Descreva apenas a cena e os elementos visuais (nada de escrever texto na imagem)."
-        )
-        if urls:
-            p01.append("Referências visuais (imagens reais do produto):\n" + "\n".join(urls))
-        p01.append(
-            "\nAgora, gere 6 descrições de imagem no formato abaixo, numeradas de 1 a 6.\n"
-            "Cada item deve começar com 'Gerar imagem X.' seguido de uma breve descrição.\n"
-            "Exemplo:\n"
-            "Gerar imagem 1. **Usando no Parque** Uma pessoa relaxando em um parque usando o produto.\n"
-        )
-        prompt_01 = "\n".join(p01).strip() + "\n"
-
-        p02 = f"""Gere um roteiro curto em pt-BR para TikTok do produto **{produto}**.
+        out.append((i, produto, urls))
+    return out
+
+def build_prompts(produto: str, urls: List[str], guide_text: str = "") -> Tuple[str, str, str]:
+    """Monta (prompt_01_cenas, prompt_02_roteiro, prompt_03_invideo) de um produto."""
+    p01 = []
+    if guide_text:
+        p01.append("# Contexto (guia)\n" + guide_text.strip() + "\n")
+    p01.append(f"Você vai propor 6 ideias visuais para o produto: **{produto}**.")
+    p01.append(
+        "- Regras obrigatórias para TODAS as ideias: proporção **9:16 (vertical)** e **sem textos/legendas/overlays** na imagem.\n"
+        "- Descreva apenas a cena e os elementos visuais (nada de escrever texto na imagem)."
+    )
+    if urls:
+        p01.append("Referências visuais (imagens reais do produto):\n" + "\n".join(urls))
+    p01.append(
+        "\nAgora, gere 6 descrições de imagem no formato abaixo, numeradas de 1 a 6.\n"
+        "Cada item deve começar com 'Gerar imagem X.' seguido de uma breve descrição.\n"
+        "Exemplo:\n"
+        "Gerar imagem 1. **Usando no Parque** Uma pessoa relaxando em um parque usando o produto.\n"
+    )
+    prompt_01 = "\n".join(p01).strip() + "\n"
+
+    p02 = f"""Gere um roteiro curto em pt-BR para TikTok do produto **{produto}**.
 Regras:
 - Frases curtas, objetivas; máximo ~160 palavras no total.
 - Estrutura: gancho/dor → benefício/curiosidade → prova simples → CTA curto ("Link na bio" ou "Link no perfil").
@@ -118,25 +97,108 @@ Regras:
 - Linguagem natural, sem jargões.
 """
 
-        p03 =f"""Esse é o roteiro do meu vídeo de vendas para o tiktok, dimensões 9:16. O produto é **{produto}**.
+    p03 =f"""Esse é o roteiro do meu vídeo de vendas para o tiktok, dimensões 9:16. O produto é **{produto}**.
 Important: No Captions, No avatar, No Narrator image. Crie a voz com essas falas:
 No Captions, No avatar, No Narrator image.
 
 [roteiro Chatgpt]
 """
+    return prompt_01, p02.strip() + "\n", p03.strip() + "\n"
 
-        # --------- Write files ---------
-        (pack_dir / "prompt_01_cenas.txt").write_text(prompt_01, encoding="utf-8")
-        (pack_dir / "prompt_02_roteiro.txt").write_text(p02.strip() + "\n", encoding="utf-8")
-        (pack_dir / "prompt_03_invideo.txt").write_text(p03.strip() + "\n", encoding="utf-8")
+def resolve_guide(path: str) -> Path:
+    guide_path = Path(path)
+    # se vier só o nome, tenta em guides/
+    if not guide_path.exists():
+        alt = Path("guides") / guide_path.name
+        guide_path = alt if alt.exists() else guide_path
+    return guide_path
 
-        created += 1
-        print(f"[{i:03d}] pack criado: {pack_dir.name}")
+def main():
+    ap = argparse.ArgumentParser(description="Gera prompt packs a partir de CSV.")
+    ap.add_argument("--guide", default="guides/Guia criação dos vídeos.txt",
+                    help="Guia base (opcional). Default: guides/Guia criação dos vídeos.txt")
+    ap.add_argument("--csv", default="data/batch_items.csv",
+                    help="CSV com colunas: produto, shopee_image_urls")
+    ap.add_argument("--packs-root", default="outputs/prompt_packs",
+                    help="Diretório de saída dos packs")
+    ap.add_argument("--store", default="",
+                    help="Arquivo SQLite de packs (ex.: outputs/packs.sqlite); se vazio, grava pastas em --packs-root")
+    ap.add_argument("--dedup", choices=["off", "flag", "merge"], default="off",
+                    help="Quase duplicados: 'flag' cria o pack marcado para reaproveitar o canônico; 'merge' não cria o pack")
+    ap.add_argument("--dedup-threshold", type=float, default=0.7,
+                    help="Similaridade mínima (Jaccard dos tokens do nome) para considerar duplicado")
+    args = ap.parse_args()
+
+    guide_path = resolve_guide(args.guide)
+
+    csv_path = Path(args.csv)
+    out_root = Path(args.packs_root)
+    if not args.store:
+        out_root.mkdir(parents=True, exist_ok=True)
+
+    if not csv_path.exists():
+        raise SystemExit(f"CSV não encontrado: {csv_path.resolve()}")
+
+    guide_text = read_text(guide_path)  # opcional
+
+    items = load_rows(csv_path)
+
+    # deduplicação (antes de criar packs / gastar chamadas)
+    # IDs com largura fixa (≥ 3 dígitos): a ordem de texto dos IDs (store.ids()) é a
+    # ordem das linhas, e o canônico de um duplicado sempre roda antes dele
+    width = max(3, len(str(max((i for i, _, _ in items), default=0))))
+    pack_ids = {i: f"{i:0{width}d}-{slugify(produto)}" for i, produto, _ in items if produto}
+    dups = {}
+    if args.dedup != "off":
+        from dedup_products import find_duplicates, print_report
+        valid = [(i, produto, urls) for i, produto, urls in items if produto]
+        found = find_duplicates([p for _, p, _ in valid], [u for _, _, u in valid],
+                                threshold=args.dedup_threshold)
+        print_report([p for _, p, _ in valid], found, [pack_ids[i] for i, _, _ in valid])
+        dups = {valid[k][0]: (valid[c][0], score, why) for k, (c, score, why) in found.items()}
+
+    canon_of = {}
+    for i, (canon, _, _) in dups.items():
+        canon_of.setdefault(canon, []).append(pack_ids[i])
 
+    created = 0
+    merged = 0
+    with open_store(out_root, args.store) as store:
+        for i, produto, urls in items:
+            if not produto:
+                print(f"[{i:03d}] pulado: sem 'produto'")
+                continue
+
+            pack_id = pack_ids[i]
+            meta = {"row": i, "produto": produto, "urls": urls, "duplicate_of": None, "duplicates": []}
+            if i in dups:
+                canon, score, why = dups[i]
+                if args.dedup == "merge":
+                    merged += 1
+                    print(f"[{i:03d}] mesclado em {pack_ids[canon]} ({why}, {score:.2f})")
+                    continue
+                meta.update({"duplicate_of": pack_ids[canon], "similarity": round(score, 3)})
+            if i in canon_of:
+                meta["duplicates"] = canon_of[i]
+            store.put_pack(pack_id, meta)
+
+            prompt_01, p02, p03 = build_prompts(produto, urls, guide_text)
+
+            # --------- Write files ---------
+            store.write(pack_id, "prompt_01_cenas.txt", prompt_01)
+            store.write(pack_id, "prompt_02_roteiro.txt", p02)
+            store.write(pack_id, "prompt_03_invideo.txt", p03)
+
+            created += 1
+            print(f"[{i:03d}] pack criado: {pack_id}")
+
+    dest = Path(args.store) if args.store else out_root
+    if merged:
+        print(f"♻️  {merged} duplicata(s) mesclada(s) sem criar pack.")
     if created == 0:
         print("⚠️ Nenhum pack foi criado (linhas sem 'produto'?).")
     else:
-        print(f"🎉 {created} pack(s) criado(s) em {out_root.resolve()}")
+        print(f"🎉 {created} pack(s) criado(s) em {dest.resolve()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,317 @@
+# tools/pack_store.py
+# ===============================================================
+# Armazenamento dos prompt packs em um único arquivo SQLite.
+# Substitui milhares de .txt pequenos (prompt_*, RESPOSTA_*, final) por
+# uma tabela indexada por pack: acesso aleatório por ID e iteração em
+# streaming. O layout em pastas só é exportado ("materialize") para os
+# packs que alguém realmente precisa abrir.
+#
+# Uso:
+#   python tools/pack_store.py ls          --store outputs/packs.sqlite
+#   python tools/pack_store.py import      --store outputs/packs.sqlite --packs-root outputs/prompt_packs
+#   python tools/pack_store.py materialize --store outputs/packs.sqlite --out outputs/prompt_packs 001-webcam-full-hd
+#   python tools/pack_store.py materialize --store outputs/packs.sqlite --out outputs/prompt_packs --match webcam
+# ===============================================================
+
+import argparse
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packs (
+    id      TEXT PRIMARY KEY,
+    meta    TEXT NOT NULL DEFAULT '{}',
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    pack_id TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    content TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (pack_id, name)
+) WITHOUT ROWID;
+"""
+
+
+class PackStore:
+    """
+    Packs em SQLite. Cada pack tem metadados (JSON) e arquivos de texto
+    nomeados exatamente como no layout em pastas (ex.: 'prompt_01_cenas.txt').
+    As escritas ficam numa transação aberta e são confirmadas a cada
+    `commit_every` operações (e no close), para não pagar um fsync por arquivo.
+    """
+
+    def __init__(self, path: Path, commit_every: int = 500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.commit_every = max(1, commit_every)
+        self._pending = 0
+
+    # ---- ciclo de vida ----
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+    def _touch(self, n: int = 1):
+        self._pending += n
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    # ---- packs ----
+
+    def put_pack(self, pack_id: str, meta: Optional[dict] = None):
+        """Cria/atualiza o pack (metadados são mesclados com os existentes)."""
+        merged = {**self.meta(pack_id), **(meta or {})}
+        self.conn.execute(
+            "INSERT INTO packs (id, meta, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET meta = excluded.meta, updated = excluded.updated",
+            (pack_id, json.dumps(merged, ensure_ascii=False), time.time()),
+        )
+        self._touch()
+
+    def meta(self, pack_id: str) -> dict:
+        row = self.conn.execute("SELECT meta FROM packs WHERE id = ?", (pack_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def has_pack(self, pack_id: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM packs WHERE id = ?", (pack_id,)).fetchone() is not None
+
+    def ids(self, page: int = 1000) -> Iterator[str]:
+        """
+        Itera os IDs em ordem, em páginas (keyset), sem carregar tudo em memória.
+        Paginar evita manter um cursor aberto enquanto o chamador grava no store.
+        """
+        last = ""
+        while True:
+            rows = self.conn.execute(
+                "SELECT id FROM packs WHERE id > ? ORDER BY id LIMIT ?", (last, page)
+            ).fetchall()
+            if not rows:
+                return
+            for (pack_id,) in rows:
+                yield pack_id
+            last = rows[-1][0]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM packs").fetchone()[0]
+
+    # ---- arquivos ----
+
+    def read(self, pack_id: str, name: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT content FROM files WHERE pack_id = ? AND name = ?", (pack_id, name)
+        ).fetchone()
+        return row[0] if row else None
+
+    def write(self, pack_id: str, name: str, text: str):
+        if not self.has_pack(pack_id):
+            self.put_pack(pack_id)
+        self.conn.execute(
+            "INSERT INTO files (pack_id, name, content, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(pack_id, name) DO UPDATE SET content = excluded.content, updated = excluded.updated",
+            (pack_id, name, (text or "").strip() + "\n", time.time()),
+        )
+        self._touch()
+
+    def names(self, pack_id: str) -> List[str]:
+        cur = self.conn.execute("SELECT name FROM files WHERE pack_id = ? ORDER BY name", (pack_id,))
+        return [r[0] for r in cur]
+
+    def files(self, pack_id: str) -> Dict[str, str]:
+        cur = self.conn.execute("SELECT name, content FROM files WHERE pack_id = ? ORDER BY name", (pack_id,))
+        return {name: content for name, content in cur}
+
+    # ---- import/export ----
+
+    def import_dir(self, packs_root: Path) -> int:
+        """
+        Importa o layout em pastas (<root>/<pack>/*.txt) para o store, incluindo
+        os finais que o runner grava em <pack>/<pack>/ (<pack>.txt e <pack>_variant_NN.txt).
+        """
+        total = 0
+        for pack in sorted(p for p in Path(packs_root).iterdir() if p.is_dir()):
+            meta_path = pack / "_meta.json"
+            meta = json.loads(read_text(meta_path)) if meta_path.exists() else {}
+            self.put_pack(pack.name, {**meta, "source": str(pack)})
+            for f in sorted(pack.glob("*.txt")):
+                self.write(pack.name, f.name, read_text(f))
+            for f in sorted((pack / pack.name).glob(f"{pack.name}*.txt")):
+                if f.stem == pack.name or f.stem.startswith(f"{pack.name}_variant_"):
+                    self.write(pack.name, f.name, read_text(f))
+            total += 1
+        self.commit()
+        return total
+
+    def materialize(self, out_root: Path, pack_ids: Iterable[str]) -> List[Path]:
+        """Exporta os packs escolhidos para <out_root>/<pack>/<arquivo>."""
+        out: List[Path] = []
+        for pack_id in pack_ids:
+            files = self.files(pack_id)
+            if not files:
+                print(f"⚠️  {pack_id}: não encontrado no store — pulando.")
+                continue
+            pack_dir = Path(out_root) / pack_id
+            pack_dir.mkdir(parents=True, exist_ok=True)
+            for name, content in files.items():
+                (pack_dir / name).write_text(content, encoding="utf-8")
+            (pack_dir / "_meta.json").write_text(
+                json.dumps(self.meta(pack_id), ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            out.append(pack_dir)
+        return out
+
+
+# Metadados que o layout em pastas já carrega (nome da pasta / CSV); sozinhos
+# não justificam um _meta.json extra por pack.
+IMPLIED_META = ("row", "produto", "urls")
+
+
+class FolderStore:
+    """
+    Mesma interface do PackStore sobre o layout clássico em pastas
+    (<packs_root>/<pack>/<arquivo>.txt), para os scripts tratarem os dois iguais.
+    O _meta.json só é gravado quando há algo além de IMPLIED_META (ex.: duplicate_of).
+    """
+
+    def __init__(self, packs_root: Path):
+        self.root = Path(packs_root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def put_pack(self, pack_id: str, meta: Optional[dict] = None):
+        (self.root / pack_id).mkdir(parents=True, exist_ok=True)
+        path = self.root / pack_id / "_meta.json"
+        notable = any(v for k, v in (meta or {}).items() if k not in IMPLIED_META)
+        if meta and (notable or path.exists()):   # existente: atualiza (ex.: deixou de ser duplicado)
+            merged = {**self.meta(pack_id), **meta}
+            path.write_text(
+                json.dumps(merged, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+    def meta(self, pack_id: str) -> dict:
+        path = self.root / pack_id / "_meta.json"
+        return json.loads(read_text(path)) if path.exists() else {}
+
+    def has_pack(self, pack_id: str) -> bool:
+        return (self.root / pack_id).is_dir()
+
+    def ids(self) -> Iterator[str]:
+        if not self.root.exists():
+            return iter(())
+        return iter(sorted(p.name for p in self.root.iterdir() if p.is_dir()))
+
+    def count(self) -> int:
+        return sum(1 for _ in self.ids())
+
+    def read(self, pack_id: str, name: str) -> Optional[str]:
+        path = self.root / pack_id / name
+        return read_text(path) if path.exists() else None
+
+    def write(self, pack_id: str, name: str, text: str):
+        path = self.root / pack_id / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text((text or "").strip() + "\n", encoding="utf-8")
+
+    def names(self, pack_id: str) -> List[str]:
+        return sorted(f.name for f in (self.root / pack_id).glob("*.txt"))
+
+    def files(self, pack_id: str) -> Dict[str, str]:
+        return {name: self.read(pack_id, name) or "" for name in self.names(pack_id)}
+
+
+def open_store(packs_root: Path, store: Optional[str] = None):
+    """Abre o SQLite se --store foi informado; senão, usa as pastas de packs_root."""
+    return PackStore(Path(store)) if store else FolderStore(Path(packs_root))
+
+
+def read_text(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return path.read_text(encoding="utf-8-sig")
+
+
+# ----------------- CLI -----------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Store SQLite de prompt packs (ls / import / materialize).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ls = sub.add_parser("ls", help="Lista packs e arquivos do store")
+    ls.add_argument("--store", required=True, help="Arquivo SQLite (ex.: outputs/packs.sqlite)")
+
+    imp = sub.add_parser("import", help="Importa um diretório de packs para o store")
+    imp.add_argument("--store", required=True)
+    imp.add_argument("--packs-root", default="outputs/prompt_packs")
+
+    mat = sub.add_parser("materialize", help="Exporta packs do store para pastas")
+    mat.add_argument("--store", required=True)
+    mat.add_argument("--out", default="outputs/prompt_packs", help="Diretório de destino")
+    mat.add_argument("packs", nargs="*", help="IDs dos packs (ex.: 001-webcam-full-hd)")
+    mat.add_argument("--match", default="", help="Exporta os packs cujo ID contém este trecho")
+    mat.add_argument("--all", action="store_true", help="Exporta todos os packs")
+    args = ap.parse_args()
+
+    store_path = Path(args.store)
+    if args.cmd != "import" and not store_path.exists():
+        raise SystemExit(f"Store não encontrado: {store_path.resolve()}")
+
+    with PackStore(store_path) as store:
+        if args.cmd == "ls":
+            for pack_id in store.ids():
+                print(f"{pack_id}  ({', '.join(store.names(pack_id))})")
+            print(f"\n📦 {store.count()} pack(s) em {store_path.resolve()}")
+
+        elif args.cmd == "import":
+            packs_root = Path(args.packs_root)
+            if not packs_root.exists():
+                raise SystemExit(f"Pasta não encontrada: {packs_root.resolve()}")
+            n = store.import_dir(packs_root)
+            print(f"🎉 {n} pack(s) importado(s) para {store_path.resolve()}")
+
+        elif args.cmd == "materialize":
+            if args.all:
+                wanted = list(store.ids())
+            else:
+                wanted = list(args.packs)
+                if args.match:
+                    needle = args.match.lower()
+                    wanted += [p for p in store.ids() if needle in p.lower() and p not in wanted]
+            if not wanted:
+                raise SystemExit("Informe IDs de packs, --match ou --all.")
+            done = store.materialize(Path(args.out), wanted)
+            for d in done:
+                print(f"📂 exportado: {d}")
+            print(f"\n🎉 {len(done)} pack(s) exportado(s) em {Path(args.out).resolve()}")
+
+
+if __name__ == "__main__":
+    main()
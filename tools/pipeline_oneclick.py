@@ -12,12 +12,29 @@ def run(cmd):
 def main():
     ap = argparse.ArgumentParser(description="One-click: CSV -> packs -> prompts finais (+ download de imagem)")
     ap.add_argument("--csv", required=True, help="CSV com product_name/produto e shopee_image_urls")
+    ap.add_argument("--guide", default="guides/Guia criação dos vídeos.txt", help="Guia base usado nos prompts")
+    ap.add_argument("--plan", action="store_true", help="Só estima custo/duração (plan_batch.py); não grava packs nem chama a API")
     ap.add_argument("--packs-root", default=str(ROOT / "outputs" / "prompt_packs"))
     ap.add_argument("--final-root", default="", help="Onde salvar os arquivo .txt")
+    ap.add_argument("--store", default="", help="Arquivo SQLite de packs (ex.: outputs/packs.sqlite) em vez de pastas")
+    ap.add_argument("--dedup", choices=["off", "flag", "merge"], default="off", help="Quase duplicados no CSV (ver make_prompt_packs.py)")
+    ap.add_argument("--dedup-threshold", type=float, default=0.7)
     ap.add_argument("--model", default="gpt-4o-mini")
     ap.add_argument("--temperature", type=float, default=0.7)
     ap.add_argument("--only-final", action="store_true", help="Não salvar intermediários RESPOSTA_*.txt")
     ap.add_argument("--skip-existing", action="store_true", help="Pular packs já processados")
+    ap.add_argument("--deadlines", default="", help="Prazos por tarefa: 'cenas=90,roteiro=60,descricao=30'")
+    ap.add_argument("--hedge", action="store_true", help="Hedge das chamadas lentas (texto e imagens)")
+    ap.add_argument("--hedge-budget", type=float, default=0.05)
+    ap.add_argument("--variants", type=int, default=1, help="Variantes (A/B) por pack, numa única chamada n=K")
+    ap.add_argument("--local-desc", action="store_true", help="Descrição/hashtags offline a partir dos finais antigos (LLM só com confiança baixa)")
+    ap.add_argument("--local-desc-rate", type=float, default=0.0, help="No --plan: fração esperada de descrições resolvidas pelo --local-desc")
+    ap.add_argument("--postprocess", action="store_true", help="Converte as PNGs em 1080x1920 JPEG/WebP + miniaturas + folha de contato")
+    ap.add_argument("--post-workers", type=int, default=0, help="Processos do pós-processamento (0 = nº de CPUs)")
+    ap.add_argument("--render", action="store_true", help="Renderiza um slideshow 9:16 (MP4) por produto com ffmpeg local")
+    ap.add_argument("--audio", default="", help="Trilha padrão do slideshow (ou audio.mp3/voz.mp3 na pasta do produto)")
+    ap.add_argument("--render-workers", type=int, default=0, help="Processos do render (0 = automático)")
+    ap.add_argument("--threads-per-job", type=int, default=2, help="Threads de cada ffmpeg do render")
     # flags do downloader do run_prompt_packs_openai.py
     ap.add_argument("--download-image", action="store_true")
     ap.add_argument("--images-from", choices=["csv","p01"], default="csv")
@@ -25,10 +42,28 @@ def main():
     ap.add_argument("--max-images", type=int, default=1)
     args = ap.parse_args()
 
+    # 0) (opcional) só o plano
+    if args.plan:
+        cmd = [sys.executable, str(TOOLS/"plan_batch.py"),
+               "--csv", args.csv,
+               "--guide", args.guide,
+               "--config", str(ROOT / "configs" / "default.yaml"),
+               "--model", args.model]
+        if args.dedup != "off": cmd += ["--dedup", "--dedup-threshold", str(args.dedup_threshold)]
+        if args.hedge:          cmd += ["--hedge-budget", str(args.hedge_budget)]
+        if args.variants > 1:   cmd += ["--variants", str(args.variants)]
+        if args.local_desc_rate: cmd += ["--local-desc-rate", str(args.local_desc_rate)]
+        run(cmd)
+        return
+
     # 1) gerar os packs a partir do CSV
     run([sys.executable, str(TOOLS/"make_prompt_packs.py"),
          "--csv", args.csv,
-         "--packs-root", args.packs_root])
+         "--guide", args.guide,
+         "--packs-root", args.packs_root,
+         "--dedup", args.dedup,
+         "--dedup-threshold", str(args.dedup_threshold)]
+        + (["--store", args.store] if args.store else []))
 
     # 2) executar e produzir os .txt (+ download de imagem)
     cmd = [sys.executable, str(TOOLS/"run_prompt_packs_openai.py"),
@@ -38,6 +73,11 @@ def main():
     if args.only_final:      cmd.append("--only-final")
     if args.skip_existing:   cmd.append("--skip-existing")
     if args.final_root:      cmd += ["--final-root", args.final_root]
+    if args.store:           cmd += ["--store", args.store]
+    if args.local_desc:      cmd.append("--local-desc")
+    if args.variants > 1:    cmd += ["--variants", str(args.variants)]
+    if args.deadlines:       cmd += ["--deadlines", args.deadlines]
+    if args.hedge:           cmd += ["--hedge", "--hedge-budget", str(args.hedge_budget)]
     if args.download_image:  cmd.append("--download-image")
     cmd += ["--images-from", args.images_from,
             "--csv-path", args.csv_path,
@@ -55,15 +95,33 @@ def main():
         subprocess.run([
             sys.executable, str(TOOLS / "generate_images_openai.py"),
             "--packs-root", args.packs_root,
+            "--store", args.store,
             "--model", "gpt-image-1",
             "--size", "1024x1536",
             "--source-root", args.final_root if args.final_root else "",
             "--final-root",  args.final_root if args.final_root else "",
             "--overwrite"
-        ], check=False)
+        ] + (["--hedge", "--hedge-budget", str(args.hedge_budget)] if args.hedge else []), check=False)
     except Exception as e:
         print(f"⚠️  Falha ao gerar imagens IA: {e}")
 
+    # 4) (opcional) assets 9:16 prontos para o TikTok
+    if args.postprocess:
+        run([sys.executable, str(TOOLS / "postprocess_images.py"),
+             "--root", args.final_root or args.packs_root,
+             "--workers", str(args.post_workers)])
+
+    # 5) (opcional) slideshow MP4 por produto (ffmpeg local)
+    if args.render:
+        cmd = [sys.executable, str(TOOLS / "render_slideshow.py"),
+               "--root", args.final_root or args.packs_root,
+               "--packs-root", args.packs_root,
+               "--workers", str(args.render_workers),
+               "--threads-per-job", str(args.threads_per_job)]
+        if args.store: cmd += ["--store", args.store]
+        if args.audio: cmd += ["--audio", args.audio]
+        run(cmd)
+
     print("\n🎉 Pipeline concluído!")
 
 if __name__ == "__main__":
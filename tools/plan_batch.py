@@ -0,0 +1,238 @@
+# tools/plan_batch.py
+# ===============================================================
+# Planejamento antes de rodar um lote (--plan no pipeline_oneclick.py).
+# Lê o CSV e o guia, monta os prompts em memória (sem gravar packs) e estima,
+# por tipo de chamada (cenas, roteiro, descrição, imagens), os tokens de
+# entrada/saída, as repetições esperadas e o número de imagens. Com os preços
+# e limites de configs/default.yaml projeta custo, duração para cada
+# concorrência e a concorrência que termina mais rápido sob RPM/TPM.
+#
+# Uso:
+#   python tools/plan_batch.py --csv data/batch_items.csv
+#   python tools/plan_batch.py --csv data/batch_items.csv --model gpt-4.1-mini --concurrency 1 4 16 --dedup
+# ===============================================================
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from make_prompt_packs import build_prompts, load_rows, read_text, resolve_guide
+from run_prompt_packs_openai import (FIX_DESCRICAO, FIX_IMAGENS, MASTER_SYSTEM, REFORCO_IMAGENS,
+                                     build_desc_prompt, fix_roteiro_prompt)
+
+TEXT_TASKS = ("cenas", "roteiro", "descricao")
+
+
+def load_config(path: Path) -> dict:
+    if not path.exists():
+        raise SystemExit(f"Config não encontrada: {path.resolve()}")
+    with path.open("r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+def calibrate_chars_per_token(samples: List[str], model: str, default: float) -> float:
+    """Mede chars/token com tiktoken numa amostra; sem tiktoken, usa o valor da config."""
+    try:
+        import tiktoken
+    except ImportError:
+        return default
+    try:
+        enc = tiktoken.encoding_for_model(model)
+    except KeyError:
+        enc = tiktoken.get_encoding("o200k_base")
+    chars = sum(len(s) for s in samples)
+    tokens = sum(len(enc.encode(s)) for s in samples)
+    return chars / tokens if tokens else default
+
+def fmt_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    if h:
+        return f"{h}h {m:02d}min"
+    if m:
+        return f"{m}min {s:02d}s"
+    return f"{s}s"
+
+
+# ----------------- estimativa -----------------
+
+def estimate_calls(items, guide_text: str, cfg: dict, images_per_pack: int,
+                   local_desc_rate: float = 0.0, max_words: int = 160, variants: int = 1) -> Dict[str, dict]:
+    """
+    Soma caracteres de entrada por tipo de chamada, montando os prompts exatamente
+    como make_prompt_packs/run_prompt_packs_openai fariam. Só comprimentos são
+    guardados, então 100k linhas cabem em poucos segundos.
+    Retorna {tarefa: {"calls", "in_chars", "out_tokens"}} (chamadas já com repetições).
+    Com `variants` K, cenas e roteiro pedem n=K numa chamada (prompt cobrado uma
+    vez, saída K vezes); a descrição é uma chamada por variante de roteiro. Só as
+    variantes reprovadas são reparadas.
+    """
+    plan = cfg.get("plan", {})
+    out_tok = plan.get("output_tokens", {})
+    retry = plan.get("retry_rate", {})
+    cpt = float(plan.get("chars_per_token", 3.6))
+
+    sys_len = len(MASTER_SYSTEM)
+    fix_rot_len = len(fix_roteiro_prompt(max_words)) + len("\n\n\n\n---\nRascunho anterior (encurtar):\n")
+    rot_out_chars = out_tok.get("roteiro", 260) * cpt
+
+    n = 0
+    in_cenas = in_roteiro = in_desc = 0
+    for _, produto, urls in items:
+        p01, p02, _ = build_prompts(produto, urls, guide_text)
+        n += 1
+        in_cenas += sys_len + len(p01) + len(REFORCO_IMAGENS)
+        in_roteiro += sys_len + len(p02)
+        in_desc += sys_len + len(build_desc_prompt(produto.title(), "")) + rot_out_chars
+
+    r_c, r_r, r_d = (float(retry.get(t, 0)) for t in ("cenas", "roteiro", "descricao"))
+    K = max(1, variants)
+    avg_c = in_cenas / max(1, n)
+    avg_r = in_roteiro / max(1, n)
+    avg_d = in_desc / max(1, n)
+    desc_share = 1.0 - (local_desc_rate if K == 1 else 0.0)   # descrição local só sem variantes
+    p_c = 1 - (1 - r_c) ** K   # cenas: um único reparo com n = nº de reprovadas
+    o_c, o_r, o_d = (out_tok.get(t, d) for t, d in (("cenas", 700), ("roteiro", 260), ("descricao", 140)))
+    desc_chars_out = o_d * cpt
+    return {
+        "cenas": {
+            "calls": n * (1 + p_c),
+            # repetição reenvia o prompt reforçado + pedido de ajuste
+            "in_chars": in_cenas + n * p_c * (avg_c + 2 + len(FIX_IMAGENS)),
+            "out_tokens": n * K * (1 + r_c) * o_c,
+        },
+        "roteiro": {
+            "calls": n * (1 + K * r_r),
+            # repetição (por variante) reenvia o prompt + ajuste + rascunho anterior
+            "in_chars": in_roteiro + n * K * r_r * (avg_r + fix_rot_len + rot_out_chars),
+            "out_tokens": n * K * (1 + r_r) * o_r,
+        },
+        "descricao": {
+            # uma chamada por variante (cada descrição parte do próprio roteiro)
+            "calls": n * desc_share * K * (1 + r_d),
+            "in_chars": n * desc_share * K * (avg_d + r_d * (avg_d + len(FIX_DESCRICAO) + desc_chars_out)),
+            "out_tokens": n * desc_share * K * (1 + r_d) * o_d,
+        },
+        "imagem": {"calls": n * images_per_pack, "in_chars": 0, "out_tokens": 0},
+        "_packs": n,
+    }
+
+def best_concurrency(latency_total: float, rate_bound: float) -> int:
+    """Menor concorrência a partir da qual o limite de taxa (e não a latência) manda."""
+    if rate_bound <= 0:
+        return 1
+    return max(1, math.ceil(latency_total / rate_bound))
+
+
+# ----------------- CLI -----------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Estima custo e duração de um lote sem chamar a API nem gravar packs.")
+    ap.add_argument("--csv", default="data/batch_items.csv")
+    ap.add_argument("--guide", default="guides/Guia criação dos vídeos.txt")
+    ap.add_argument("--config", default="configs/default.yaml")
+    ap.add_argument("--model", default="gpt-4o-mini")
+    ap.add_argument("--image-model", default="gpt-image-1")
+    ap.add_argument("--image-size", default="1024x1536")
+    ap.add_argument("--images-per-pack", type=int, default=None, help="Default: plan.images_per_pack da config (0 = sem imagens)")
+    ap.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 8, 16, 32],
+                    help="Concorrências para projetar a duração")
+    ap.add_argument("--dedup", action="store_true", help="Desconta produtos quase duplicados (dedup_products)")
+    ap.add_argument("--dedup-threshold", type=float, default=0.7)
+    ap.add_argument("--local-desc-rate", type=float, default=0.0,
+                    help="Fração esperada de descrições resolvidas localmente (--local-desc)")
+    ap.add_argument("--variants", type=int, default=1, help="Variantes por pack (--variants do runner)")
+    ap.add_argument("--hedge-budget", type=float, default=0.0, help="Chamadas extras por hedge (fração), se usar --hedge")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    cfg = load_config(Path(args.config))
+    csv_path = Path(args.csv)
+    if not csv_path.exists():
+        raise SystemExit(f"CSV não encontrado: {csv_path.resolve()}")
+    guide_text = read_text(resolve_guide(args.guide))
+    items = [it for it in load_rows(csv_path) if it[1]]
+
+    dup_count = 0
+    if args.dedup:
+        from dedup_products import find_duplicates
+        dups = find_duplicates([p for _, p, _ in items], [u for _, _, u in items], threshold=args.dedup_threshold)
+        dup_count = len(dups)
+        items = [it for k, it in enumerate(items) if k not in dups]
+
+    plan = cfg.get("plan", {})
+    sample = [build_prompts(p, u, guide_text)[0] for _, p, u in items[:50]]
+    cpt = calibrate_chars_per_token(sample + [MASTER_SYSTEM], args.model, float(plan.get("chars_per_token", 3.6)))
+    cfg.setdefault("plan", {})["chars_per_token"] = cpt
+
+    ipp = args.images_per_pack if args.images_per_pack is not None else int(plan.get("images_per_pack", 6))
+    est = estimate_calls(items, guide_text, cfg, ipp, local_desc_rate=args.local_desc_rate, variants=args.variants)
+    n_packs = est.pop("_packs")
+    extra = 1.0 + args.hedge_budget
+
+    # ---- custo ----
+    prices = cfg.get("pricing", {})
+    text_price = prices.get(args.model)
+    if not text_price:
+        print(f"⚠️  Sem preço para '{args.model}' em {args.config}; custo de texto = 0.")
+        text_price = {"input": 0.0, "output": 0.0}
+    img_price = (prices.get(args.image_model) or {}).get(args.image_size)
+    if img_price is None and ipp:
+        print(f"⚠️  Sem preço para '{args.image_model}' {args.image_size}; custo de imagens = 0.")
+        img_price = 0.0
+
+    latency = cfg.get("latency", {})
+    limits = cfg.get("limits", {})
+    rows = []
+    tot_cost = tot_in = tot_out = text_calls = text_latency = 0.0
+    for task in TEXT_TASKS + ("imagem",):
+        e = est[task]
+        calls = e["calls"] * extra
+        in_tok = e["in_chars"] / cpt * extra
+        out_tok = e["out_tokens"] * extra
+        if task == "imagem":
+            cost = calls * (img_price or 0.0)
+        else:
+            cost = (in_tok * text_price["input"] + out_tok * text_price["output"]) / 1e6
+            tot_in += in_tok
+            tot_out += out_tok
+            text_calls += calls
+            text_latency += calls * float(latency.get(task, 5))
+        tot_cost += cost
+        rows.append((task, calls, in_tok, out_tok, cost))
+
+    print(f"\n🧮 Plano: {n_packs} pack(s) × {args.variants} variante(s) — modelo {args.model}, imagens {args.image_model} {args.image_size} × {ipp}/pack"
+          + (f" — {dup_count} duplicata(s) descontada(s)" if args.dedup else ""))
+    print(f"   (~{cpt:.2f} caracteres/token)\n")
+    print(f"   {'chamada':<10} {'chamadas':>10} {'tokens in':>12} {'tokens out':>12} {'custo US$':>11}")
+    for task, calls, in_tok, out_tok, cost in rows:
+        print(f"   {task:<10} {calls:>10,.0f} {in_tok:>12,.0f} {out_tok:>12,.0f} {cost:>11,.2f}")
+    print(f"   {'TOTAL':<10} {sum(r[1] for r in rows):>10,.0f} {tot_in:>12,.0f} {tot_out:>12,.0f} {tot_cost:>11,.2f}")
+
+    # ---- duração ----
+    rpm, tpm = float(limits.get("rpm", 0)), float(limits.get("tpm", 0))
+    ipm = float(limits.get("images_per_minute", 0))
+    img_calls = rows[-1][1]
+    img_latency = img_calls * float(latency.get("imagem", 25))
+    text_rate = max(text_calls / rpm * 60 if rpm else 0.0, (tot_in + tot_out) / tpm * 60 if tpm else 0.0)
+    img_rate = img_calls / ipm * 60 if ipm else 0.0
+
+    print(f"\n⏱️  Duração estimada (texto + imagens), limites: {rpm:.0f} RPM, {tpm:,.0f} TPM, {ipm:.0f} img/min")
+    for k in sorted(set(args.concurrency)):
+        wall = max(text_latency / k, text_rate) + max(img_latency / k, img_rate)
+        print(f"   concorrência {k:>3}: {fmt_duration(wall)}")
+    k_text = best_concurrency(text_latency, text_rate)
+    k_img = best_concurrency(img_latency, img_rate) if img_calls else 1
+    best_wall = max(text_latency / k_text, text_rate) + max(img_latency / k_img, img_rate)
+    print(f"   mais rápida: {k_text} em paralelo (texto) e {k_img} (imagens) → {fmt_duration(best_wall)}; "
+          "acima disso os limites RPM/TPM é que mandam")
+    print("   (o pipeline atual processa os packs em série: concorrência 1)")
+    print(f"\n⚡ Plano calculado em {time.perf_counter() - t0:.2f}s — nada foi gravado nem enviado à API.")
+
+
+if __name__ == "__main__":
+    main()
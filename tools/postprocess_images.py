@@ -0,0 +1,213 @@
+# tools/postprocess_images.py
+# ===============================================================
+# Pós-processamento das PNGs geradas (001.png … 006.png por produto) para
+# assets prontos para o TikTok, em paralelo (um processo por produto):
+#   - 1080x1920 (9:16): recorte central na área segura + redimensionamento
+#     numa única passada (resize com box);
+#   - JPEG e WebP otimizados, miniatura e uma folha de contato 6-up (3×2);
+# tudo a partir de uma única decodificação de cada PNG. O manifesto
+# (_post.json) guarda o hash de cada PNG + parâmetros; o que já está
+# atualizado é pulado.
+#
+# Uso:
+#   python tools/postprocess_images.py --root outputs/prompt_packs
+#   python tools/postprocess_images.py --root "C:\PASTA_DESTINO" --workers 4 --formats jpg
+# ===============================================================
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+OUT_DIR = "tiktok"          # subpasta de saída dentro da pasta de cada produto
+MANIFEST = "_post.json"
+SHEET = "contact_sheet.jpg"
+
+
+# ----------------- geometria -----------------
+
+def safe_box(w: int, h: int, aspect: float = 9 / 16) -> Tuple[float, float, float, float]:
+    """Maior retângulo central com a proporção `aspect` (largura/altura) dentro de w×h."""
+    if w / h > aspect:
+        cw = h * aspect
+        x0 = (w - cw) / 2
+        return (x0, 0.0, x0 + cw, float(h))
+    ch = w / aspect
+    y0 = (h - ch) / 2
+    return (0.0, y0, float(w), y0 + ch)
+
+def params_key(opts: dict) -> str:
+    """Hash curto dos parâmetros de saída (mudou tamanho/qualidade → refaz)."""
+    return hashlib.sha1(json.dumps(opts, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# ----------------- trabalho por produto (roda no processo filho) -----------------
+
+def _load_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _outputs_for(out_dir: Path, stem: str, opts: dict) -> List[Path]:
+    outs = [out_dir / f"{stem}.{fmt}" for fmt in opts["formats"]]
+    return outs + [out_dir / f"{stem}_thumb.jpg"]
+
+def _contact_sheet(tiles: List[Tuple[str, Image.Image]], opts: dict) -> Image.Image:
+    tw, th = opts["thumb"]
+    cols, gap = 3, 12
+    rows = max(1, -(-len(tiles) // cols))
+    sheet = Image.new("RGB", (cols * tw + (cols + 1) * gap, rows * th + (rows + 1) * gap), (24, 24, 24))
+    draw = ImageDraw.Draw(sheet)
+    for k, (label, tile) in enumerate(tiles):
+        x = gap + (k % cols) * (tw + gap)
+        y = gap + (k // cols) * (th + gap)
+        sheet.paste(tile, (x, y))
+        draw.rectangle((x, y, x + 34, y + 18), fill=(0, 0, 0))
+        draw.text((x + 4, y + 3), label, fill=(255, 255, 255))
+    return sheet
+
+def process_pack(pack_dir: str, opts: dict) -> dict:
+    """
+    Processa as PNGs de um produto. Retorna contagens e o tempo gasto para o
+    relatório. Cada PNG é lida e decodificada uma única vez; todas as saídas
+    (formatos, miniatura, folha de contato) saem do mesmo frame em memória.
+    """
+    t0 = time.perf_counter()
+    pack = Path(pack_dir)
+    out_dir = pack / OUT_DIR
+    manifest_path = out_dir / MANIFEST
+    manifest = _load_manifest(manifest_path)
+    key = params_key(opts)
+    W, H = opts["size"]
+
+    pngs = sorted(pack.glob("[0-9][0-9][0-9].png"))
+    entries: Dict[str, dict] = {}
+    tiles: List[Tuple[str, Optional[Image.Image]]] = []
+    done = skipped = 0
+    errors: List[str] = []
+
+    for png in pngs:
+        stem = png.stem
+        try:
+            data = png.read_bytes()
+        except OSError as e:
+            errors.append(f"{png.name}: {e}")
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        entry = {"sha1": digest, "params": key}
+        entries[png.name] = entry
+
+        if manifest.get("images", {}).get(png.name) == entry and all(p.exists() for p in _outputs_for(out_dir, stem, opts)):
+            skipped += 1
+            tiles.append((stem, None))   # miniatura já gravada; só é aberta se a folha precisar ser refeita
+            continue
+
+        try:
+            with Image.open(io.BytesIO(data)) as im:
+                im.load()
+                src = im.convert("RGB") if im.mode != "RGB" else im
+                frame = src.resize((W, H), Image.LANCZOS, box=safe_box(*src.size, aspect=W / H))
+        except Exception as e:
+            errors.append(f"{png.name}: {e}")
+            entries.pop(png.name, None)
+            continue
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if "jpg" in opts["formats"]:
+            frame.save(out_dir / f"{stem}.jpg", "JPEG", quality=opts["jpeg_quality"], optimize=True, progressive=True)
+        if "webp" in opts["formats"]:
+            frame.save(out_dir / f"{stem}.webp", "WEBP", quality=opts["webp_quality"], method=4)
+        thumb = frame.resize(tuple(opts["thumb"]), Image.BILINEAR, reducing_gap=2.0)
+        thumb.save(out_dir / f"{stem}_thumb.jpg", "JPEG", quality=80, optimize=True)
+        tiles.append((stem, thumb))
+        done += 1
+
+    sheet_path = out_dir / SHEET
+    sheet_key = [key] + [entries[n]["sha1"] for n in sorted(entries)]
+    if entries and (done or manifest.get("sheet") != sheet_key or not sheet_path.exists()):
+        ready: List[Tuple[str, Image.Image]] = []
+        for stem, tile in tiles[:6]:
+            if tile is None:
+                with Image.open(out_dir / f"{stem}_thumb.jpg") as t:
+                    tile = t.convert("RGB")
+            ready.append((stem, tile))
+        _contact_sheet(ready, opts).save(sheet_path, "JPEG", quality=85, optimize=True)
+
+    if entries:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(
+            json.dumps({"images": entries, "sheet": sheet_key}, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    return {"pack": pack.name, "done": done, "skipped": skipped, "errors": errors,
+            "seconds": time.perf_counter() - t0, "pid": os.getpid()}
+
+
+# ----------------- CLI -----------------
+
+def find_packs(root: Path) -> List[Path]:
+    return sorted(p for p in root.iterdir() if p.is_dir() and any(p.glob("[0-9][0-9][0-9].png")))
+
+def main():
+    ap = argparse.ArgumentParser(description="Pós-processa as PNGs geradas em assets 9:16 (JPEG/WebP, miniatura, folha de contato).")
+    ap.add_argument("--root", default="outputs/prompt_packs", help="Pasta com uma subpasta por produto (--final-root da pipeline, se usado)")
+    ap.add_argument("--workers", type=int, default=0, help="Processos em paralelo (0 = nº de CPUs)")
+    ap.add_argument("--size", default="1080x1920", help="Tamanho final LxA")
+    ap.add_argument("--formats", default="jpg,webp", help="Formatos de saída: jpg, webp ou ambos")
+    ap.add_argument("--jpeg-quality", type=int, default=88)
+    ap.add_argument("--webp-quality", type=int, default=82)
+    ap.add_argument("--thumb", default="270x480", help="Tamanho da miniatura LxA")
+    ap.add_argument("--match", default="", help="Só os produtos cujo nome da pasta contém este trecho")
+    args = ap.parse_args()
+
+    root = Path(args.root)
+    if not root.exists():
+        raise SystemExit(f"Pasta não encontrada: {root.resolve()}")
+    formats = [f.strip().lower().replace("jpeg", "jpg") for f in args.formats.split(",") if f.strip()]
+    if not formats or any(f not in ("jpg", "webp") for f in formats):
+        raise SystemExit(f"Formatos inválidos em --formats: {args.formats!r}")
+    opts = {
+        "size": [int(x) for x in args.size.lower().split("x")],
+        "thumb": [int(x) for x in args.thumb.lower().split("x")],
+        "formats": formats,
+        "jpeg_quality": args.jpeg_quality,
+        "webp_quality": args.webp_quality,
+    }
+
+    packs = find_packs(root)
+    if args.match:
+        packs = [p for p in packs if args.match.lower() in p.name.lower()]
+    if not packs:
+        print("ℹ️  Nenhuma pasta com 001.png…006.png encontrada.")
+        return
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"🖼️  Pós-processando {len(packs)} produto(s) com {min(workers, len(packs))} processo(s)…")
+    t0 = time.perf_counter()
+    done = skipped = 0
+    with ProcessPoolExecutor(max_workers=min(workers, len(packs))) as pool:
+        futures = [pool.submit(process_pack, str(p), opts) for p in packs]
+        for fut in as_completed(futures):
+            res = fut.result()
+            done += res["done"]
+            skipped += res["skipped"]
+            for err in res["errors"]:
+                print(f"❌  {res['pack']}: {err}")
+            if res["done"]:
+                print(f"✅  {res['pack']}: {res['done']} imagem(ns) em {res['seconds']:.1f}s")
+
+    elapsed = time.perf_counter() - t0
+    print(f"\n🎉 {done} imagem(ns) processada(s), {skipped} já atualizada(s) — "
+          f"{elapsed:.1f}s ({done / elapsed if elapsed > 0 else 0:.1f} imagens/s)")
+
+
+if __name__ == "__main__":
+    main()
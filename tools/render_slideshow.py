@@ -0,0 +1,347 @@
+# tools/render_slideshow.py
+# ===============================================================
+# Monta um slideshow 9:16 (MP4) por produto a partir das imagens geradas
+# (001…006), com pan/zoom (zoompan) e transições, usando o ffmpeg local.
+# O tempo de cada imagem sai do roteiro: as frases são repartidas entre as
+# imagens e o vídeo dura o tempo de leitura do roteiro (palavras/segundo da
+# config) ou, com narração na pasta do produto, o tempo da narração.
+#
+# Cada imagem vira um segmento próprio (cache em <produto>/_segments/, nome =
+# hash da imagem + parâmetros): trocar uma imagem re-renderiza só aquele
+# segmento; o vídeo final é só a concatenação (sem re-encode) + áudio opcional.
+# Os segmentos de todos os produtos são distribuídos num pool de processos e
+# cada ffmpeg recebe um orçamento de threads (--threads-per-job).
+#
+# Uso:
+#   python tools/render_slideshow.py --root outputs/prompt_packs
+#   python tools/render_slideshow.py --root "C:\PASTA_DESTINO" --audio trilha.mp3 --workers 4 --threads-per-job 2
+# ===============================================================
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from pack_store import open_store, read_text
+from run_prompt_packs_openai import parse_final, roteiro_from_invideo
+
+ROOT = Path(__file__).resolve().parents[1]
+SEG_DIR = "_segments"
+MANIFEST = "_render.json"
+AUDIO_NAMES = ("audio", "voz", "narracao", "trilha")
+NARRATION_NAMES = ("audio", "voz", "narracao")   # na pasta do produto: o vídeo segue o tempo dela
+AUDIO_EXTS = (".mp3", ".m4a", ".aac", ".wav", ".ogg")
+MOTIONS = ("in", "left", "out", "right")   # alterna o movimento entre as imagens
+
+VIDEO_DEFAULTS = {
+    "size": "1080x1920",
+    "fps": 30,
+    "words_per_second": 2.5,
+    "min_segment": 1.5,
+    "default_segment": 3.0,
+    "transition": 0.35,
+    "zoom": 0.12,
+    "crf": 20,
+    "preset": "veryfast",
+}
+
+
+# ----------------- roteiro → tempos -----------------
+
+def find_script(pack_id: str, image_dir: Path, store) -> str:
+    """
+    Roteiro do pack: RESPOSTA_prompt_02 no store/packs ou, com --only-final,
+    as falas do final (<final-root>/<pack>/<pack>.txt ou <pack>/<pack>/<pack>.txt).
+    """
+    text = store.read(pack_id, "RESPOSTA_prompt_02_roteiro.txt")
+    if not text:
+        final = store.read(pack_id, f"{pack_id}.txt")
+        for path in (image_dir / f"{pack_id}.txt", image_dir / pack_id / f"{pack_id}.txt"):
+            if not final and path.exists():
+                final = read_text(path)
+        invideo = parse_final(final).get("invideo", "") if final else ""
+        text = roteiro_from_invideo(invideo, store.read(pack_id, "prompt_03_invideo.txt")) if invideo else ""
+    return "" if text.startswith("[ERRO") else text
+
+def segment_durations(script: str, n: int, cfg: dict, seconds: Optional[float] = None) -> List[float]:
+    """
+    Reparte as frases do roteiro entre n imagens (pela contagem acumulada de
+    palavras) e divide o tempo total na proporção das palavras de cada trecho.
+    O total é `seconds` (duração da narração) ou o tempo de leitura do roteiro;
+    nenhum trecho fica abaixo de min_segment e a soma continua igual ao total.
+    Sem roteiro nem narração, duração fixa.
+    """
+    if n <= 0:
+        return []
+    sentences = [s for s in re.split(r"(?<=[.!?…])\s+|\n+", script.strip()) if s.strip()]
+    counts = [len(re.findall(r"\w+", s)) for s in sentences]
+    total = sum(counts)
+    if not total and not seconds:
+        return [float(cfg["default_segment"])] * n
+    words = [0] * n if total else [1] * n
+    acc = 0
+    for c in counts:
+        # frase vai para a imagem onde está o seu "meio"
+        k = min(n - 1, int((acc + c / 2) / total * n))
+        words[k] += c
+        acc += c
+    lo = float(cfg["min_segment"])
+    # sem narração, um roteiro muito curto ainda mostra cada imagem pelo mínimo
+    seconds = seconds or max(n * lo, total / float(cfg["words_per_second"]))
+    lo = min(lo, seconds / n)
+    # os trechos curtos ficam no mínimo; o resto do tempo é repartido entre os outros
+    fixed: set = set()
+    while True:
+        free = [k for k in range(n) if k not in fixed]
+        share = (seconds - lo * len(fixed)) / max(1, sum(words[k] for k in free))
+        short = {k for k in free if words[k] * share < lo}
+        if not short:
+            break
+        fixed |= short
+    durations = [lo if k in fixed else words[k] * share for k in range(n)]
+    out = [round(d, 2) for d in durations[:-1]]
+    return out + [round(seconds - sum(out), 2)]
+
+
+# ----------------- ffmpeg -----------------
+
+def zoompan_filter(motion: str, frames: int, cfg: dict) -> str:
+    W, H = (int(x) for x in cfg["size"].lower().split("x"))
+    z, last = float(cfg["zoom"]), max(1, frames - 1)
+    cx, cy = "iw/2-(iw/zoom/2)", "ih/2-(ih/zoom/2)"
+    if motion == "in":
+        zexpr, x, y = f"1+{z}*on/{last}", cx, cy
+    elif motion == "out":
+        zexpr, x, y = f"{1 + z}-{z}*on/{last}", cx, cy
+    elif motion == "left":
+        zexpr, x, y = f"{1 + z}", f"(iw-iw/zoom)*on/{last}", cy
+    else:
+        zexpr, x, y = f"{1 + z}", f"(iw-iw/zoom)*(1-on/{last})", cy
+    # sobe para 2x antes do zoompan (evita o "tremido" do arredondamento de x/y)
+    return (f"scale={2 * W}:{2 * H}:force_original_aspect_ratio=increase,crop={2 * W}:{2 * H},"
+            f"zoompan=z='{zexpr}':x='{x}':y='{y}':d={frames}:s={W}x{H}:fps={cfg['fps']}")
+
+def render_segment(job: dict) -> dict:
+    """
+    Roda no processo filho: renderiza uma imagem em um segmento MP4 (H.264,
+    fade de entrada/saída) com no máximo `threads` threads do ffmpeg.
+    """
+    cfg, dur = job["cfg"], job["duration"]
+    frames = max(1, int(round(dur * cfg["fps"])))
+    tr = min(float(cfg["transition"]), dur / 3)
+    vf = (zoompan_filter(job["motion"], frames, cfg)
+          + f",fade=t=in:st=0:d={tr:.3f},fade=t=out:st={dur - tr:.3f}:d={tr:.3f},format=yuv420p")
+    out = Path(job["out"])
+    tmp = out.with_name(out.stem + ".tmp.mp4")
+    cmd = [job["ffmpeg"], "-hide_banner", "-loglevel", "error", "-y",
+           "-i", job["image"], "-vf", vf, "-frames:v", str(frames), "-r", str(cfg["fps"]),
+           "-c:v", "libx264", "-preset", str(cfg["preset"]), "-crf", str(cfg["crf"]),
+           "-pix_fmt", "yuv420p", "-threads", str(job["threads"]), "-filter_threads", str(job["threads"]),
+           "-an", str(tmp)]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    seconds = time.perf_counter() - t0
+    if proc.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        return {"pack": job["pack"], "ok": False, "error": proc.stderr.strip()[-400:],
+                "frames": 0, "seconds": seconds, "pid": os.getpid()}
+    os.replace(tmp, out)
+    return {"pack": job["pack"], "ok": True, "frames": frames, "seconds": seconds, "pid": os.getpid()}
+
+def concat_segments(ffmpeg: str, segments: List[Path], out: Path, audio: Optional[Path],
+                    narration: bool = False) -> Optional[str]:
+    """Junta os segmentos sem re-encode (mesmos parâmetros) e, se houver, põe o áudio."""
+    lst = out.parent / SEG_DIR / "concat.txt"
+    lst.write_text("".join(f"file '{s.resolve().as_posix()}'\n" for s in segments), encoding="utf-8")
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-f", "concat", "-safe", "0", "-i", str(lst)]
+    if audio:
+        cmd += ["-i", str(audio), "-map", "0:v", "-map", "1:a", "-c:v", "copy", "-c:a", "aac", "-b:a", "160k"]
+        if not narration:
+            cmd.append("-shortest")   # trilha: corta no fim do vídeo; narração nunca é cortada
+    else:
+        cmd += ["-c", "copy"]
+    tmp = out.with_name(out.stem + ".tmp.mp4")
+    proc = subprocess.run(cmd + ["-movflags", "+faststart", str(tmp)], capture_output=True, text=True)
+    if proc.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        return proc.stderr.strip()[-400:]
+    os.replace(tmp, out)
+    return None
+
+
+# ----------------- planejamento por produto -----------------
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def pack_images(pack_dir: Path) -> List[Path]:
+    """Prefere os JPEGs 1080x1920 do postprocess_images.py; senão, as PNGs originais."""
+    pngs = sorted(pack_dir.glob("[0-9][0-9][0-9].png"))
+    post = pack_dir / "tiktok"
+    return [post / f"{p.stem}.jpg" if (post / f"{p.stem}.jpg").exists() else p for p in pngs]
+
+def find_audio(pack_dir: Path, default: Optional[Path]) -> Tuple[Optional[Path], bool]:
+    """Áudio do produto e se é narração (audio/voz/narracao na própria pasta) ou trilha."""
+    for f in sorted(pack_dir.iterdir()):
+        if f.stem.lower() in AUDIO_NAMES and f.suffix.lower() in AUDIO_EXTS:
+            return f, f.stem.lower() in NARRATION_NAMES
+    return default, False
+
+def audio_seconds(ffmpeg: str, audio: Path) -> Optional[float]:
+    """Duração do áudio pelo cabeçalho que o ffmpeg imprime (None se não der para ler)."""
+    proc = subprocess.run([ffmpeg, "-hide_banner", "-i", str(audio)], capture_output=True, text=True)
+    m = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", proc.stderr)
+    return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)) if m else None
+
+def load_video_config(path: Path) -> dict:
+    cfg = dict(VIDEO_DEFAULTS)
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            cfg.update(((yaml.safe_load(f) or {}).get("video") or {}))
+    return cfg
+
+
+# ----------------- CLI -----------------
+
+def main():
+    ap = argparse.ArgumentParser(description="Renderiza um slideshow 9:16 (MP4) por produto com ffmpeg local.")
+    ap.add_argument("--root", default="outputs/prompt_packs", help="Pasta com uma subpasta por produto (--final-root da pipeline, se usado)")
+    ap.add_argument("--packs-root", default="outputs/prompt_packs", help="Packs (para achar o roteiro)")
+    ap.add_argument("--store", default="", help="Arquivo SQLite de packs (para achar o roteiro)")
+    ap.add_argument("--config", default=str(ROOT / "configs" / "default.yaml"))
+    ap.add_argument("--audio", default="", help="Trilha padrão (cada produto pode ter audio.mp3/voz.mp3 na própria pasta)")
+    ap.add_argument("--ffmpeg", default=os.environ.get("FFMPEG_BIN", "ffmpeg"), help="Binário do ffmpeg")
+    ap.add_argument("--workers", type=int, default=0, help="Processos em paralelo (0 = nº de CPUs / threads por job)")
+    ap.add_argument("--threads-per-job", type=int, default=2, help="Threads de cada ffmpeg")
+    ap.add_argument("--match", default="", help="Só os produtos cujo nome da pasta contém este trecho")
+    ap.add_argument("--force", action="store_true", help="Ignora o cache de segmentos")
+    args = ap.parse_args()
+
+    ffmpeg = shutil.which(args.ffmpeg) or (args.ffmpeg if Path(args.ffmpeg).exists() else None)
+    if not ffmpeg:
+        raise SystemExit(f"ffmpeg não encontrado ({args.ffmpeg}). Instale o ffmpeg ou use --ffmpeg / FFMPEG_BIN.")
+    root = Path(args.root)
+    if not root.exists():
+        raise SystemExit(f"Pasta não encontrada: {root.resolve()}")
+    default_audio = Path(args.audio) if args.audio else None
+    if default_audio and not default_audio.exists():
+        raise SystemExit(f"Áudio não encontrado: {default_audio.resolve()}")
+
+    cfg = load_video_config(Path(args.config))
+    params = hashlib.sha1(json.dumps(cfg, sort_keys=True).encode("utf-8")).hexdigest()
+    threads = max(1, args.threads_per_job)
+    workers = args.workers or max(1, (os.cpu_count() or 1) // threads)
+
+    packs = sorted(p for p in root.iterdir() if p.is_dir() and any(p.glob("[0-9][0-9][0-9].png")))
+    if args.match:
+        packs = [p for p in packs if args.match.lower() in p.name.lower()]
+    if not packs:
+        print("ℹ️  Nenhuma pasta com 001.png…006.png encontrada.")
+        return
+
+    store = open_store(Path(args.packs_root), args.store)
+
+    # 1) planeja: um segmento por imagem; o hash decide o que já está pronto
+    plans: Dict[str, dict] = {}
+    jobs: List[dict] = []
+    cached = 0
+    for pack_dir in packs:
+        images = pack_images(pack_dir)
+        script = find_script(pack_dir.name, pack_dir, store)
+        audio, narration = find_audio(pack_dir, default_audio)
+        narration_seconds = audio_seconds(ffmpeg, audio) if narration else None
+        durations = segment_durations(script, len(images), cfg, narration_seconds)
+        seg_dir = pack_dir / SEG_DIR
+        seg_dir.mkdir(exist_ok=True)
+        segments = []
+        for k, (img, dur) in enumerate(zip(images, durations)):
+            motion = MOTIONS[k % len(MOTIONS)]
+            key = hashlib.sha1(f"{file_hash(img)}|{params}|{dur}|{motion}".encode("utf-8")).hexdigest()[:16]
+            seg = seg_dir / f"{img.stem}-{key}.mp4"
+            segments.append(seg)
+            if seg.exists() and not args.force:
+                cached += 1
+                continue
+            jobs.append({"pack": pack_dir.name, "image": str(img), "out": str(seg), "duration": dur,
+                         "motion": motion, "cfg": cfg, "threads": threads, "ffmpeg": ffmpeg})
+        for old in seg_dir.glob("*.mp4"):   # segmentos de imagens antigas
+            if old not in segments:
+                old.unlink(missing_ok=True)
+        timing = "narração" if narration_seconds else "roteiro" if script else "duração fixa"
+        plans[pack_dir.name] = {"dir": pack_dir, "segments": segments, "audio": audio, "narration": narration,
+                                "seconds": sum(durations), "timing": timing}
+    store.close()
+
+    print(f"🎬 {len(packs)} produto(s): {len(jobs)} segmento(s) a renderizar, {cached} no cache "
+          f"— {min(workers, max(1, len(jobs)))} processo(s) × {threads} thread(s).")
+
+    # 2) renderiza os segmentos em paralelo; cada produto é concatenado assim que fica completo
+    pending = defaultdict(int)
+    for job in jobs:
+        pending[job["pack"]] += 1
+    failed = set()
+    per_worker = defaultdict(lambda: [0, 0.0])
+    rendered = 0
+
+    def finish(pack_id: str):
+        plan = plans[pack_id]
+        out = plan["dir"] / f"{pack_id}.mp4"
+        state = {"segments": [s.name for s in plan["segments"]],
+                 "audio": file_hash(plan["audio"]) if plan["audio"] else None}
+        manifest = plan["dir"] / SEG_DIR / MANIFEST
+        if out.exists() and manifest.exists() and json.loads(read_text(manifest)) == state:
+            return
+        err = concat_segments(ffmpeg, plan["segments"], out, plan["audio"], plan["narration"])
+        if err:
+            print(f"❌  {pack_id}: falha ao juntar os segmentos: {err}")
+            return
+        manifest.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"✅  {out} ({plan['seconds']:.1f}s, {plan['timing']}{', com áudio' if plan['audio'] else ''})")
+
+    t0 = time.perf_counter()
+    for pack_id in plans:
+        if not pending[pack_id]:
+            finish(pack_id)
+    if jobs:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(render_segment, job) for job in jobs]
+            for fut in as_completed(futures):
+                res = fut.result()
+                pack_id = res["pack"]
+                if res["ok"]:
+                    rendered += 1
+                    per_worker[res["pid"]][0] += res["frames"]
+                    per_worker[res["pid"]][1] += res["seconds"]
+                else:
+                    failed.add(pack_id)
+                    print(f"❌  {pack_id}: {res['error']}")
+                pending[pack_id] -= 1
+                if not pending[pack_id] and pack_id not in failed:
+                    finish(pack_id)
+
+    elapsed = time.perf_counter() - t0
+    if per_worker:
+        print("\n⏱️  Frames/s por processo:")
+        for pid, (frames, secs) in sorted(per_worker.items()):
+            print(f"   pid {pid:<7} {frames:>6} frames em {secs:6.1f}s → {frames / secs if secs else 0:6.1f} fps")
+        total_frames = sum(f for f, _ in per_worker.values())
+        print(f"   total: {total_frames} frames em {elapsed:.1f}s → {total_frames / elapsed if elapsed else 0:.1f} fps")
+    print(f"\n🎉 {len(plans) - len(failed)} vídeo(s) prontos; {rendered} segmento(s) renderizado(s), {cached} reaproveitado(s).")
+
+
+if __name__ == "__main__":
+    main()
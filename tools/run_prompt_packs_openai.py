@@ -8,6 +8,10 @@
 #   python tools/run_prompt_packs_openai.py --model gpt-4o-mini --temperature 0.7 --only-final
 #   python tools/run_prompt_packs_openai.py --model gpt-4o-mini --temperature 0.7 --only-final --final-root "D:/Conteudos/Resultados"
 #   python tools/run_prompt_packs_openai.py --only-final --download-image --images-from csv --csv-path data/batch_items.csv --max-images 1
+#   python tools/run_prompt_packs_openai.py --store outputs/packs.sqlite --final-root "D:/Conteudos/Resultados"
+#   python tools/run_prompt_packs_openai.py --only-final --local-desc --desc-corpus "D:/Conteudos/Resultados"
+#   python tools/run_prompt_packs_openai.py --only-final --variants 3
+#   python tools/run_prompt_packs_openai.py --only-final --deadlines "cenas=90,roteiro=60,descricao=30" --hedge --hedge-budget 0.05
 
 import argparse
 import os
@@ -21,9 +25,15 @@ from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 from dotenv import load_dotenv
 
+from hedging import HedgedCaller, parse_deadlines
+from pack_store import open_store
+
 PACKS_ROOT = Path("outputs") / "prompt_packs"
 PLACEHOLDER = "[roteiro Chatgpt]"
 
+# Prazos/hedge das chamadas (configurado no main; None = chamada direta, sem prazo)
+CALLER: Optional[HedgedCaller] = None
+
 MASTER_SYSTEM = """Você é um redator e diretor de conteúdo para TikTok em pt-BR.
 Regras gerais:
 - Formato vertical 9:16.
@@ -54,19 +64,35 @@ def write(path: Path, text: str):
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text((text or "").strip() + "\n", encoding="utf-8")
 
-def ask_openai(prompt: str, model: str, temperature: float, system: Optional[str] = None) -> str:
+def ask_openai_n(prompt: str, model: str, temperature: float, n: int = 1,
+                 system: Optional[str] = None, task: str = "default") -> List[str]:
+    """Uma chamada com n escolhas (n>1): o prompt é cobrado uma vez só."""
     from openai import OpenAI
-    client = OpenAI()
+    # com hedge, a cópia faz o papel do retry: sem retries do SDK, a tentativa
+    # que perdeu para de verdade no próprio timeout; sem hedge, os retries continuam
+    client = OpenAI(max_retries=0) if CALLER and CALLER.hedge else OpenAI()
     msgs = []
     if system:
         msgs.append({"role": "system", "content": system})
     msgs.append({"role": "user", "content": prompt})
-    resp = client.chat.completions.create(
-        model=model,
-        temperature=temperature,
-        messages=msgs,
-    )
-    return resp.choices[0].message.content.strip()
+
+    def create(timeout: Optional[float] = None):
+        extra = {"timeout": timeout} if timeout else {}
+        if n > 1:
+            extra["n"] = n
+        return client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=msgs,
+            **extra,
+        )
+
+    resp = CALLER.call(task, create) if CALLER else create()
+    return [(c.message.content or "").strip() for c in resp.choices]
+
+def ask_openai(prompt: str, model: str, temperature: float, system: Optional[str] = None,
+               task: str = "default") -> str:
+    return ask_openai_n(prompt, model, temperature, 1, system=system, task=task)[0]
 
 def count_words(text: str) -> int:
     return len(re.findall(r"\w+", text, flags=re.UNICODE))
@@ -92,42 +118,168 @@ def split_to_6_blocks(text: str) -> List[str]:
     parts = [b.strip() for b in re.split(r"\n\s*\n", text.strip()) if b.strip()]
     return parts
 
-def run_imagens(p01: str, model: str, temperature: float) -> str:
-    reforco = (
-        "\n\n[REQUISITOS OBRIGATÓRIOS — IMAGENS]\n"
-        "- Proporção estrita: 9:16 (vertical).\n"
-        "- A imagem NÃO pode conter textos, legendas, marcas d’água ou overlays.\n"
-        "- Descreva apenas a cena/elementos visuais (sem pedir textos na imagem).\n"
+# Textos fixos dos passos (também usados pelo plan_batch.py para estimar tokens)
+REFORCO_IMAGENS = (
+    "\n\n[REQUISITOS OBRIGATÓRIOS — IMAGENS]\n"
+    "- Proporção estrita: 9:16 (vertical).\n"
+    "- A imagem NÃO pode conter textos, legendas, marcas d’água ou overlays.\n"
+    "- Descreva apenas a cena/elementos visuais (sem pedir textos na imagem).\n"
+)
+FIX_IMAGENS = (
+    "Ajuste a resposta garantindo que TODAS as variações especifiquem explicitamente: "
+    "Proporção 9:16 e que a imagem não possui texto/legendas. "
+    "Mantenha a descrição visual; não altere o conteúdo além disso."
+)
+
+def fix_roteiro_prompt(max_words: int) -> str:
+    return (
+        f"A resposta ficou longa. Encurte para no máximo {max_words} palavras, mantendo a estrutura: "
+        "dor/gancho → curiosidade → benefícios/prova simples → CTA curto ('Link na bio' ou 'Link no perfil'). "
+        "Apenas o texto do roteiro."
     )
 
-    prompt_reforcado = f"{p01}{reforco}"
+def build_desc_prompt(produto: str, roteiro: str) -> str:
+    return (
+        "Escreva UMA descrição curta (2–3 frases) para TikTok em pt-BR, seguida de 8–12 hashtags específicas do nicho.\n"
+        f"Produto: {produto}\n"
+        "Use linguagem direta e um CTA curto (ex.: 'Link na bio'). Evite emojis excessivos.\n"
+        "Use o roteiro abaixo como contexto, sem copiar literalmente:\n"
+        f"---\n{roteiro}\n---"
+    )
+
+FIX_DESCRICAO = (
+    "Ajuste a descrição para terminar com 8 a 12 hashtags específicas do nicho. "
+    "Mantenha o texto; devolva apenas a descrição e as hashtags."
+)
 
-    out = ask_openai(prompt_reforcado, model, temperature, system=MASTER_SYSTEM)
+# ----- validações locais (decidem o que precisa de reparo) -----
 
-    lower = out.lower()
-    has_ratio = "9:16" in out
+def cenas_ok(text: str) -> bool:
+    lower = text.lower()
+    has_ratio = "9:16" in text
     mentions_no_text = ("sem texto" in lower) or ("sem textos" in lower) or ("sem legenda" in lower) or ("sem legendas" in lower)
-    if not (has_ratio and mentions_no_text):
-        fix = (
-            "Ajuste a resposta garantindo que TODAS as variações especifiquem explicitamente: "
-            "Proporção 9:16 e que a imagem não possui texto/legendas. "
-            "Mantenha a descrição visual; não altere o conteúdo além disso."
-        )
-        out = ask_openai(f"{prompt_reforcado}\n\n{fix}", model, temperature, system=MASTER_SYSTEM)
+    return has_ratio and mentions_no_text
+
+def roteiro_ok(text: str, max_words: int = 160) -> bool:
+    return count_words(text) <= max_words
+
+def descricao_ok(text: str, min_tags: int = 8, max_tags: int = 12) -> bool:
+    return min_tags <= len(extract_hashtags(text)) <= max_tags
+
+# ----- geração (K variantes numa chamada; só as reprovadas são reparadas) -----
+
+def run_imagens_variants(p01: str, model: str, temperature: float, variants: int = 1) -> List[str]:
+    prompt_reforcado = f"{p01}{REFORCO_IMAGENS}"
+    outs = ask_openai_n(prompt_reforcado, model, temperature, variants, system=MASTER_SYSTEM, task="cenas")
+    bad = [i for i, out in enumerate(outs) if not cenas_ok(out)]
+    if bad:
+        # o pedido de ajuste é igual para todas: uma chamada com n = nº de reprovadas
+        fixed = ask_openai_n(f"{prompt_reforcado}\n\n{FIX_IMAGENS}", model, temperature, len(bad),
+                             system=MASTER_SYSTEM, task="cenas")
+        for i, out in zip(bad, fixed):
+            outs[i] = out
+    return outs
+
+def run_roteiro_variants(p02: str, model: str, temperature: float, variants: int = 1,
+                         max_words: int = 160) -> List[str]:
+    outs = ask_openai_n(p02, model, temperature, variants, system=MASTER_SYSTEM, task="roteiro")
+    for i, out in enumerate(outs):
+        if not roteiro_ok(out, max_words):
+            outs[i] = ask_openai(f"{p02}\n\n{fix_roteiro_prompt(max_words)}\n\n---\nRascunho anterior (encurtar):\n{out}", model, temperature, system=MASTER_SYSTEM, task="roteiro")
+    return outs
+
+def run_descricao_variants(desc_prompt: str, model: str, temperature: float, variants: int = 1) -> List[str]:
+    outs = ask_openai_n(desc_prompt, model, temperature, variants, system=MASTER_SYSTEM, task="descricao")
+    for i, out in enumerate(outs):
+        if not descricao_ok(out):
+            outs[i] = ask_openai(f"{desc_prompt}\n\n{FIX_DESCRICAO}\n\n---\nRascunho anterior:\n{out}", model, temperature, system=MASTER_SYSTEM, task="descricao")
+    return outs
+
+def run_descricao_for_scripts(produto: str, roteiros: List[str], model: str, temperature: float) -> List[str]:
+    """
+    Uma descrição por variante de roteiro, escrita a partir do próprio roteiro
+    (a variante k do final fica coerente). Roteiros iguais dividem uma chamada n>1.
+    """
+    outs = [""] * len(roteiros)
+    by_script: Dict[str, List[int]] = {}
+    for k, roteiro in enumerate(roteiros):
+        by_script.setdefault(roteiro, []).append(k)
+    for roteiro, idxs in by_script.items():
+        descs = run_descricao_variants(build_desc_prompt(produto, roteiro), model, temperature, len(idxs))
+        for k, desc in zip(idxs, descs):
+            outs[k] = desc
+    return outs
 
-    return out
+def run_imagens(p01: str, model: str, temperature: float) -> str:
+    return run_imagens_variants(p01, model, temperature, 1)[0]
 
 def run_roteiro(p02: str, model: str, temperature: float, max_words: int = 160) -> str:
-    out = ask_openai(p02, model, temperature, system=MASTER_SYSTEM)
-    if count_words(out) > max_words:
-        fix_prompt = (
-            f"A resposta ficou longa. Encurte para no máximo {max_words} palavras, mantendo a estrutura: "
-            "dor/gancho → curiosidade → benefícios/prova simples → CTA curto ('Link na bio' ou 'Link no perfil'). "
-            "Apenas o texto do roteiro."
-        )
-        out = ask_openai(f"{p02}\n\n{fix_prompt}\n\n---\nRascunho anterior (encurtar):\n{out}", model, temperature, system=MASTER_SYSTEM)
+    return run_roteiro_variants(p02, model, temperature, 1, max_words=max_words)[0]
+
+def fill_invideo(p03: Optional[str], roteiro: str) -> str:
+    if not p03:
+        return "[Sem prompt_03_invideo.txt]"
+    if PLACEHOLDER in p03 and roteiro and not roteiro.startswith("[ERRO"):
+        return p03.replace(PLACEHOLDER, roteiro)
+    return p03 + "\n\n# Roteiro (anexo)\n" + (roteiro or "")
+
+def build_final(title: str, imagens: str, invideo: str, descricao: str) -> str:
+    full = []
+    full.append(f"# {title}\n")
+    full.append("## IMAGENS (ChatGPT)\n"); full.append(imagens or "")
+    #full.append("\n## ROTEIRO (ChatGPT)\n"); full.append(roteiro or "")
+    full.append("\n## INVIDEO (READY)\n"); full.append(invideo or "")
+    full.append("\n### DESCRIÇÃO (TIKTOK)\n"); full.append(descricao or "")
+    return "\n".join(full)
+
+FINAL_HEADING = re.compile(r"^#{2,3}\s*(IMAGENS \(ChatGPT\)|INVIDEO \(READY\)|DESCRIÇÃO \(TIKTOK\))\s*$",
+                           re.IGNORECASE | re.MULTILINE)
+
+def parse_final(text: str) -> Dict[str, str]:
+    """Seções do final (build_final) → {'imagens', 'invideo', 'descricao'}."""
+    keys = {"imagens": "imagens", "invideo": "invideo", "descrição": "descricao"}
+    marks = list(FINAL_HEADING.finditer(text or ""))
+    out: Dict[str, str] = {}
+    for m, nxt in zip(marks, marks[1:] + [None]):
+        key = keys[m.group(1).split()[0].lower()]
+        out[key] = text[m.end():nxt.start() if nxt else len(text)].strip()
     return out
 
+def roteiro_from_invideo(invideo: str, p03: Optional[str]) -> str:
+    """Desfaz o fill_invideo: tira do texto pronto o que veio do template prompt_03."""
+    if "# Roteiro (anexo)" in invideo:
+        return invideo.split("# Roteiro (anexo)", 1)[1].strip()
+    if p03 and PLACEHOLDER in p03:
+        prefix, suffix = (part.strip() for part in p03.split(PLACEHOLDER, 1))
+        if invideo.startswith(prefix):
+            invideo = invideo[len(prefix):]
+            if suffix and invideo.rstrip().endswith(suffix):
+                invideo = invideo.rstrip()[:-len(suffix)]
+            return invideo.strip()
+    return ""
+
+def load_stored_results(store, pack_id: str, final_dir: Path, p03: Optional[str],
+                        variants: int = 1) -> Optional[tuple]:
+    """
+    Respostas já gravadas de um pack (de uma execução anterior), no formato do
+    reuse_cache: ([imagens], [roteiros], [descrições]). Usa os RESPOSTA_* e,
+    com --only-final, o próprio final. None se faltar alguma variante.
+    """
+    outs = ([], [], [])
+    for k in range(1, variants + 1):
+        suffix = "" if k == 1 else f"_variant_{k:02d}"
+        final = store.read(pack_id, f"{pack_id}{suffix}.txt") or read(final_dir / f"{pack_id}{suffix}.txt") or ""
+        sections = parse_final(final)
+        imagens = store.read(pack_id, f"RESPOSTA_prompt_01_cenas{suffix}.txt") or sections.get("imagens", "")
+        roteiro = (store.read(pack_id, f"RESPOSTA_prompt_02_roteiro{suffix}.txt")
+                   or roteiro_from_invideo(sections.get("invideo", ""), p03))
+        descricao = sections.get("descricao", "")
+        if not roteiro or not descricao or "[ERRO" in imagens + roteiro:
+            return None
+        for lst, val in zip(outs, (imagens.strip(), roteiro.strip(), descricao)):
+            lst.append(val)
+    return outs
+
 URL_PATTERN = re.compile(r"https?://[^\s)>\]]+", re.IGNORECASE)
 
 def parse_urls_from_p01(p01_text: Optional[str]) -> List[str]:
@@ -194,7 +346,8 @@ def download_one(url: str, dest_without_ext: Path, timeout: int = 20) -> Optiona
         return None
 
 def download_images_for_pack(pack: Path, dest_dir: Path, images_from: str,
-                             csv_map: Dict[int, List[str]], max_images: int) -> List[Path]:
+                             csv_map: Dict[int, List[str]], max_images: int,
+                             p01_text: Optional[str] = None) -> List[Path]:
     """Seleciona URLs (CSV ou p01) e baixa até N imagens para dest_dir."""
     urls: List[str] = []
     if images_from == "csv":
@@ -202,7 +355,9 @@ def download_images_for_pack(pack: Path, dest_dir: Path, images_from: str,
         if idx and idx in csv_map:
             urls = csv_map[idx]
     else:
-        urls = parse_urls_from_p01(read(pack / "prompt_01_cenas.txt"))
+        if p01_text is None:
+            p01_text = read(pack / "prompt_01_cenas.txt")
+        urls = parse_urls_from_p01(p01_text)
 
     urls = [u for u in urls if u.lower().startswith("http")]
     if not urls:
@@ -225,6 +380,7 @@ def main():
 
     ap = argparse.ArgumentParser(description="Executa packs e gera o resultado final; suporta --only-final, --final-root e download de imagens.")
     ap.add_argument("--packs-root", default=str(PACKS_ROOT), help="Pasta com os packs (default: outputs/prompt_packs)")
+    ap.add_argument("--store", default="", help="Arquivo SQLite de packs (ex.: outputs/packs.sqlite); substitui as pastas de --packs-root")
     ap.add_argument("--model", default="gpt-4o-mini", help="Modelo OpenAI (ex: gpt-4o-mini, gpt-4.1-mini, etc.)")
     ap.add_argument("--temperature", type=float, default=0.7, help="Temperatura do LLM (0.0-1.0)")
     ap.add_argument("--skip-existing", action="store_true", help="Pular packs já processados")
@@ -235,140 +391,213 @@ def main():
     ap.add_argument("--images-from", choices=["csv", "p01"], default="p01", help="Origem das URLs: 'csv' (batch_items.csv) ou 'p01' (prompt_01_cenas.txt)")
     ap.add_argument("--csv-path", default="data/batch_items.csv", help="Caminho do CSV (usado se --images-from csv)")
     ap.add_argument("--max-images", type=int, default=1, help="Máximo de imagens para baixar por pack (default: 1)")
+    ap.add_argument("--local-desc", action="store_true", help="Gera descrição/hashtags offline a partir dos finais antigos; só chama o LLM com confiança baixa")
+    ap.add_argument("--local-desc-min-score", type=float, default=0.5, help="Confiança mínima (cosseno) para usar a descrição local")
+    ap.add_argument("--desc-corpus", nargs="*", default=[], help="Pastas extras com finais antigos para o índice local")
+    ap.add_argument("--variants", type=int, default=1, help="Gera K variantes por pack: cenas e roteiro com n=K numa chamada; descrição a partir de cada roteiro")
+    ap.add_argument("--deadline", type=float, default=180, help="Prazo padrão por chamada, em segundos")
+    ap.add_argument("--deadlines", default="", help="Prazos por tarefa: 'cenas=90,roteiro=60,descricao=30'")
+    ap.add_argument("--hedge", action="store_true", help="Dispara uma cópia da chamada que passar do p95 e usa a primeira resposta")
+    ap.add_argument("--hedge-budget", type=float, default=0.05, help="Máximo de chamadas extras por hedge (fração do total)")
     args = ap.parse_args()
 
+    global CALLER
+    CALLER = HedgedCaller(deadlines=parse_deadlines(args.deadlines), default_deadline=args.deadline,
+                          hedge=args.hedge, budget=args.hedge_budget)
+
     packs_root = Path(args.packs_root)
-    if not packs_root.exists():
+    if args.store and not Path(args.store).exists():
+        raise SystemExit(f"Store não encontrado: {Path(args.store).resolve()}")
+    if not args.store and not packs_root.exists():
         raise SystemExit(f"Pasta não encontrada: {packs_root.resolve()}")
+    with open_store(packs_root, args.store) as store:
+        final_root = Path(args.final_root).resolve() if args.final_root else None
+        if final_root:
+            final_root.mkdir(parents=True, exist_ok=True)
+
+        if not store.count():
+            raise SystemExit("Nenhum pack encontrado.")
+
+        # Mapa de URLs do CSV (se necessário)
+        csv_map: Dict[int, List[str]] = {}
+        if args.download_image and args.images_from == "csv":
+            csv_map = load_urls_from_csv(Path(args.csv_path))
+
+        def result_dir_for(pack: Path) -> Path:
+            """Diretório onde o final será gravado (pack ou final_root)."""
+            return final_root if final_root else pack
+
+        def write_if(path: Path, content: str):
+            if not args.only_final:
+                store.write(path.parent.name, path.name, content)
+
+        K = max(1, args.variants)
+
+        def write_variants(pack: Path, stem: str, outs: List[str]):
+            """Variante 1 no nome de sempre; as demais (K>1) como <stem>_variant_02..K.txt."""
+            write_if(pack / f"{stem}.txt", outs[0])
+            for k, out in enumerate(outs[1:], 2):
+                write_if(pack / f"{stem}_variant_{k:02d}.txt", out)
+
+        # Descrições locais: índice dos finais antigos + geração em lote (NumPy) para todos os packs
+        local_desc: Dict[str, tuple] = {}
+        if args.local_desc:
+            from local_descriptions import LocalDescriber, product_from_pack
+            roots = [Path(p) for p in args.desc_corpus] + ([final_root] if final_root else []) + [packs_root]
+            ids = list(store.ids())
+            # sem os finais antigos dos próprios packs: numa nova rodada eles seriam o vizinho de si mesmos
+            describer = LocalDescriber.from_finals(roots, store if args.store else None, exclude=ids)
+            results = describer.generate([product_from_pack(i) for i in ids])
+            local_desc = dict(zip(ids, results))
+            confident = sum(1 for _, conf, enough in results if conf >= args.local_desc_min_score and enough)
+            print(f"📚 descrições locais: índice com {len(describer)} finais; "
+                  f"{confident}/{len(ids)} packs com confiança ≥ {args.local_desc_min_score}")
+        desc_stats = {"local": 0, "llm": 0}
+
+        reuse_cache: Dict[str, tuple] = {}   # canônico → ([imagens], [roteiros], [descrições])
+        total = 0
+        for pack_id in store.ids():
+            # com --store o diretório é só referência de nome (não existe em disco)
+            pack = packs_root / pack_id
+            if args.skip_existing:
+                print(f"⏭  pulando (já existe): {pack.name}")
+                continue
+
+            print(f"\n▶️  processando: {pack.name}")
+            CALLER.next_pack()
+
+            p01 = store.read(pack_id, "prompt_01_cenas.txt")
+            p02 = store.read(pack_id, "prompt_02_roteiro.txt")
+            p03 = store.read(pack_id, "prompt_03_invideo.txt")
+
+            if not p02:
+                print(f"⚠️  {pack.name}: falta prompt_02_roteiro.txt — pulando.")
+                continue
+
+            # duplicado (make_prompt_packs --dedup flag): reaproveita as respostas do canônico —
+            # do cache, se ele rodou nesta execução; senão, do que ficou gravado numa anterior
+            meta = store.meta(pack_id)
+            dup_of = meta.get("duplicate_of") or ""
+            reused = reuse_cache.get(dup_of)
+            if dup_of and not reused:
+                reused = load_stored_results(store, dup_of, result_dir_for(packs_root / dup_of) / dup_of,
+                                             store.read(dup_of, "prompt_03_invideo.txt"), K)
+            if reused:
+                print(f"♻️  duplicado de {meta['duplicate_of']} — reaproveitando respostas (sem chamadas à API).")
+            elif dup_of:
+                print(f"⚠️  duplicado de {dup_of}, mas o canônico ainda não tem respostas — gerando normalmente.")
+
+            # 1) IMAGENS (texto para o relatório)
+            if reused:
+                imagens_outs = reused[0]
+            elif p01:
+                try:
+                    imagens_outs = run_imagens_variants(p01, args.model, args.temperature, K)
+                except Exception as e:
+                    imagens_outs = [f"[ERRO ao gerar imagens: {e}]"] * K
+            else:
+                imagens_outs = ["[Sem prompt_01_cenas.txt]"] * K
+            if reused or p01:
+                write_variants(pack, "RESPOSTA_prompt_01_cenas", imagens_outs)
 
-    final_root = Path(args.final_root).resolve() if args.final_root else None
-    if final_root:
-        final_root.mkdir(parents=True, exist_ok=True)
-
-    packs = [p for p in packs_root.iterdir() if p.is_dir()]
-    if not packs:
-        raise SystemExit("Nenhum pack encontrado.")
-
-    # Mapa de URLs do CSV (se necessário)
-    csv_map: Dict[int, List[str]] = {}
-    if args.download_image and args.images_from == "csv":
-        csv_map = load_urls_from_csv(Path(args.csv_path))
-
-    def result_dir_for(pack: Path) -> Path:
-        """Diretório onde o final será gravado (pack ou final_root)."""
-        return final_root if final_root else pack
-
-    def write_if(path: Path, content: str):
-        if not args.only_final:
-            write(path, content)
-
-    total = 0
-    for pack in sorted(packs):
-        if args.skip_existing:
-            print(f"⏭  pulando (já existe): {pack.name}")
-            continue
-
-        print(f"\n▶️  processando: {pack.name}")
-
-        p01 = read(pack / "prompt_01_cenas.txt")
-        p02 = read(pack / "prompt_02_roteiro.txt")
-        p03 = read(pack / "prompt_03_invideo.txt")
-
-        if not p02:
-            print(f"⚠️  {pack.name}: falta prompt_02_roteiro.txt — pulando.")
-            continue
-
-        # 1) IMAGENS (texto para o relatório)
-        if p01:
-            try:
-                imagens_out = run_imagens(p01, args.model, args.temperature)
-                write_if(pack / "RESPOSTA_prompt_01_cenas.txt", imagens_out)
-            except Exception as e:
-                imagens_out = f"[ERRO ao gerar imagens: {e}]"
-                write_if(pack / "RESPOSTA_prompt_01_cenas.txt", imagens_out)
-        else:
-            imagens_out = "[Sem prompt_01_cenas.txt]"
-
-        # 2) ROTEIRO
-        try:
-            roteiro_out = run_roteiro(p02, args.model, args.temperature, max_words=160)
-            write_if(pack / "RESPOSTA_prompt_02_roteiro.txt", roteiro_out)
-        except Exception as e:
-            roteiro_out = f"[ERRO ao gerar roteiro: {e}]"
-            write_if(pack / "RESPOSTA_prompt_02_roteiro.txt", roteiro_out)
-
-        # 3) INVIDEO READY
-        if p03:
-            if PLACEHOLDER in (p03 or "") and roteiro_out and not roteiro_out.startswith("[ERRO"):
-                invideo_ready = p03.replace(PLACEHOLDER, roteiro_out)
+            # 2) ROTEIRO
+            if reused:
+                roteiro_outs = reused[1]
             else:
-                invideo_ready = (p03 or "") + "\n\n# Roteiro (anexo)\n" + (roteiro_out or "")
-            write_if(pack / "RESPOSTA_prompt_03_invideo_READY.txt", invideo_ready)
-        else:
-            invideo_ready = "[Sem prompt_03_invideo.txt]"
-            
-        # 4) DESCRIÇÃO PARA TIKTOK (gera 1 bloco curto + 8–12 hashtags)
-        try:
+                try:
+                    roteiro_outs = run_roteiro_variants(p02, args.model, args.temperature, K, max_words=160)
+                except Exception as e:
+                    roteiro_outs = [f"[ERRO ao gerar roteiro: {e}]"] * K
+            write_variants(pack, "RESPOSTA_prompt_02_roteiro", roteiro_outs)
+
+            # 3) INVIDEO READY
+            invideo_outs = [fill_invideo(p03, r) for r in roteiro_outs]
+            if p03:
+                write_variants(pack, "RESPOSTA_prompt_03_invideo_READY", invideo_outs)
+
+            # 4) DESCRIÇÃO PARA TIKTOK (gera 1 bloco curto + 8–12 hashtags)
             # Deriva um nome legível do pack (remove prefixo "001-" e troca hifens por espaços)
-            _prod = re.sub(r"^\d{3}-", "", pack.name).replace("-", " ").strip().title()
-
-            desc_prompt = (
-                "Escreva UMA descrição curta (2–3 frases) para TikTok em pt-BR, seguida de 8–12 hashtags específicas do nicho.\n"
-                f"Produto: {_prod}\n"
-                "Use linguagem direta e um CTA curto (ex.: 'Link na bio'). Evite emojis excessivos.\n"
-                "Use o roteiro abaixo como contexto, sem copiar literalmente:\n"
-                f"---\n{roteiro_out}\n---"
-            )
-            desc_tiktok_out = ask_openai(desc_prompt, args.model, args.temperature, system=MASTER_SYSTEM)
-        except Exception as e:
-            # Fallback sem API (ou em caso de erro)
-            desc_tiktok_out = (
-                f"Descubra {_prod} — prático e de alta qualidade para o dia a dia. "
-                "Conforto, desempenho e ótimo custo-benefício. Link na bio.\n\n"
-                "#Tecnologia #DicaDoDia #Achadinhos #Promo #LojaOnline #Ofertas #Review #ParaVocê #Tendências"
-            )
-
-        # 5) Consolida o final — salva em <base>/<pack.name>/<pack.name>.txt
-        base = final_root if final_root else pack
-        final_dir = (base / pack.name)
-        final_dir.mkdir(parents=True, exist_ok=True)  # garante a pasta do pack
-
-        final_path = final_dir / f"{pack.name}.txt"
-
-        full = []
-        full.append(f"# {pack.name}\n")
-        full.append("## IMAGENS (ChatGPT)\n"); full.append(imagens_out or "")
-        #full.append("\n## ROTEIRO (ChatGPT)\n"); full.append(roteiro_out or "")
-        full.append("\n## INVIDEO (READY)\n"); full.append(invideo_ready or "")
-        full.append("\n### DESCRIÇÃO (TIKTOK)\n"); full.append(desc_tiktok_out or "")
-        write(final_path, "\n".join(full))
-        print(f"✅ pronto: {final_path}")
-        
-
-        # 6) (Opcional) Baixar imagem(ns) do produto para a MESMA pasta do final
-        if args.download_image:
-            saved = download_images_for_pack(
-                pack=pack,
-                dest_dir=final_dir,
-                images_from=args.images_from,
-                csv_map=csv_map,
-                max_images=max(1, int(args.max_images)),
-            )
-            if saved:
-                print(f"🖼️  Imagens salvas em: {final_dir} → {[p.name for p in saved]}")
-
-        total += 1
-
+            _prod = re.sub(r"^\d{3,}-", "", pack.name).replace("-", " ").strip().title()
+            if reused:
+                desc_outs = reused[2]
+            else:
+                local = local_desc.get(pack_id)
+                if K == 1 and local and local[1] >= args.local_desc_min_score and local[2]:
+                    desc_outs = [local[0]]
+                    desc_stats["local"] += 1
+                    print(f"📚 descrição local (confiança {local[1]:.2f}) — sem chamada à API.")
+                else:
+                    try:
+                        desc_outs = run_descricao_for_scripts(_prod, roteiro_outs, args.model, args.temperature)
+                        desc_stats["llm"] += 1
+                    except Exception as e:
+                        # Fallback sem API (ou em caso de erro): a local só se ela servir para o
+                        # produto (confiança ≥ mínimo, mesmo com poucas hashtags); senão, o texto genérico
+                        usable = local and local[0] and local[1] >= args.local_desc_min_score
+                        desc_outs = [local[0] if usable else (
+                            f"Descubra {_prod} — prático e de alta qualidade para o dia a dia. "
+                            "Conforto, desempenho e ótimo custo-benefício. Link na bio.\n\n"
+                            "#Tecnologia #DicaDoDia #Achadinhos #Promo #LojaOnline #Ofertas #Review #ParaVocê #Tendências"
+                        )] * K
+
+            if meta.get("duplicates") and not roteiro_outs[0].startswith("[ERRO"):
+                reuse_cache[pack_id] = (imagens_outs, roteiro_outs, desc_outs)
+
+            # 5) Consolida o final — salva em <base>/<pack.name>/<pack.name>.txt
+            #    (com --store e sem --final-root, o final fica só no store)
+            #    Com --variants K, a variante 1 é o próprio <pack.name>.txt e as
+            #    demais ficam em <pack.name>_variant_02..K.txt.
+            base = final_root if final_root else pack
+            final_dir = (base / pack.name)
+            finals = [(f"{pack.name}.txt", build_final(pack.name, imagens_outs[0], invideo_outs[0], desc_outs[0]))]
+            for k, (img, inv, desc) in enumerate(zip(imagens_outs[1:], invideo_outs[1:], desc_outs[1:]), 2):
+                finals.append((f"{pack.name}_variant_{k:02d}.txt",
+                               build_final(f"{pack.name} — variante {k:02d}", img, inv, desc)))
+            for name, text in finals:
+                if args.store:
+                    store.write(pack_id, name, text)
+                if final_root or not args.store:
+                    final_dir.mkdir(parents=True, exist_ok=True)  # garante a pasta do pack
+                    write(final_dir / name, text)
+            if final_root or not args.store:
+                print(f"✅ pronto: {final_dir / finals[0][0]}" + (f" (+{K - 1} variante(s))" if K > 1 else ""))
+            else:
+                print(f"✅ pronto: {pack_id} (store)" + (f" (+{K - 1} variante(s))" if K > 1 else ""))
+            store.commit()  # uma transação por pack: Ctrl-C/queda perde no máximo o pack em andamento
+
+            # 6) (Opcional) Baixar imagem(ns) do produto para a MESMA pasta do final
+            if args.download_image:
+                saved = download_images_for_pack(
+                    pack=pack,
+                    dest_dir=final_dir,
+                    images_from=args.images_from,
+                    csv_map=csv_map,
+                    max_images=max(1, int(args.max_images)),
+                    p01_text=p01,
+                )
+                if saved:
+                    print(f"🖼️  Imagens salvas em: {final_dir} → {[p.name for p in saved]}")
+
+            total += 1
+
+    CALLER.report()
+    CALLER.close()
     print(f"\n🎉 Finalizado! {total} packs processados.")
+    if args.local_desc:
+        print(f"↳ Descrições: {desc_stats['local']} locais, {desc_stats['llm']} via LLM")
     if args.gen_images:
         try:
             import sys, subprocess
             print("\n🖼️  Chamando gerador de imagens…")
-            subprocess.run([sys.executable, "tools/generate_images_openai.py",
-                            "--packs-root", str(packs_root)], check=False)
+            cmd = [sys.executable, "tools/generate_images_openai.py", "--packs-root", str(packs_root)]
+            if args.hedge:
+                cmd += ["--hedge", "--hedge-budget", str(args.hedge_budget)]
+            if args.store:
+                cmd += ["--store", args.store]
+            subprocess.run(cmd, check=False)
         except Exception as e:
             print(f"⚠️  Falha ao gerar imagens: {e}")
-    print(f"↳ Origem dos packs: {packs_root.resolve()}")
+    print(f"↳ Origem dos packs: {Path(args.store).resolve() if args.store else packs_root.resolve()}")
     if final_root:
         print(f"↳ Resultados finais em: {final_root.resolve()}")
 